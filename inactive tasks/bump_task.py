@@ -7,10 +7,18 @@
 # ==============================================================================
 
 from pyb import ExtInt, Pin
-from time import ticks_ms, ticks_diff
+from machine import Timer
+import micropython
 
 class BumpTask:
-    """Task to handle bump sensor events and set abort flag"""
+    """Task to handle bump sensor events and set abort flag
+
+    Everything happens in the ExtInt callback and the debounce timer, so the
+    object doesn't need to be added to the scheduler; run() is kept only so
+    it can still be wrapped in a cotask.Task if desired.
+    """
+
+    DEBOUNCE_MS = 2000 # time before the bump sensor is re-enabled
 
     # --------------------------------------------------------------------------
     ### Initialize the object's attributes
@@ -21,25 +29,44 @@ class BumpTask:
         self.bump = 0
         self.bump_pin = bump_pin
 
+        # One-shot software timer that ends the debounce window
+        self.debounce_timer = Timer(-1)
+
+        # Bound methods are created once here, since creating them inside an
+        # ISR would allocate memory
+        self._on_bump_ref = self._on_bump
+        self._reenable_ref = self._reenable_bump
+        self._timer_cb_ref = self._timer_cb
+
         # Configure bump sensor interrupt
         def callback(line):
-            print("Bump sensor triggered on line =", line)
             self.extint.disable()  # Disable further interrupts to avoid multiple triggers
-            self.bump = 1   
-            self.abort.put(1)  # Set abort flag when bump sensor is triggered
+            self.bump = 1
+            self.abort.put(1, in_ISR=True)  # Set abort flag when bump sensor is triggered
+            micropython.schedule(self._on_bump_ref, line)  # finish outside the ISR
 
         self.extint = ExtInt(bump_pin, ExtInt.IRQ_FALLING, Pin.PULL_NONE, callback)
 
+    # --------------------------------------------------------------------------
+    ### HELPER FUNCTIONS (run via micropython.schedule, not in the ISR)
+    # --------------------------------------------------------------------------
+    def _on_bump(self, line):
+        print("Bump sensor triggered on line =", line)
+        # Start the debounce window; the sensor is re-enabled when it ends
+        self.debounce_timer.init(mode=Timer.ONE_SHOT, period=self.DEBOUNCE_MS,
+                                 callback=self._timer_cb_ref)
+
+    def _timer_cb(self, t):
+        micropython.schedule(self._reenable_ref, 0)
+
+    def _reenable_bump(self, _):
+        self.bump = 0
+        self.extint.enable()  # Re-enable interrupt after debounce
+        print("Bump sensor re-enabled after debounce.")
+
+    # --------------------------------------------------------------------------
     def run(self):
+        # All bump handling is event driven (ExtInt + timer callbacks), so
+        # there is nothing to poll here
         while True:
-            if self.bump == 1:
-                start = ticks_ms()
-                yield
-                while self.bump == 1:
-                    now = ticks_ms()
-                    if ticks_diff(now, start) > 2000:  # 2 seconds debounce
-                        self.bump = 0
-                        self.extint.enable()  # Re-enable interrupt after debounce
-                        print("Bump sensor re-enabled after debounce.")
-                    yield
-            yield
\ No newline at end of file
+            yield
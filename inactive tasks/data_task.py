@@ -3,8 +3,8 @@
 # ==============================================================================
 # DataCollectionTask
 # ------------------------------------------------------------------------------
-# This task logs samples (time, pos, and vel) from shares into arrays for CSV
-# export. Since we are creating an object (an instance of the class) of this
+# This task logs samples (time, pos, and vel) from shares into preallocated
+# ring buffers (typed arrays) for CSV export. Since we are creating an object (an instance of the class) of this
 # class, the object lives in memory as a single instance. We can then pass the
 # object to something else, like another task (class object). This allows the
 # other task (class object) to access the same actual instance (object) of this
@@ -24,23 +24,28 @@
 from array import array
 
 class DataCollectionTask:
-    """Records motor data, moves values from shares and into queues."""
+    """Records motor data, moves values from shares into preallocated ring buffers."""
 
     ### The states of the FSM
-    S0_INIT = 0
+    S0_INIT = 0 # not entered; buffers are emptied by reset() at the start of each run
     S1_WAIT_FOR_START_COLLECTING = 1
     S2_COLLECTING_DATA = 2
     S3_COLLECTION_DONE = 3
 
+    # Values per motor sample (time, left_pos, right_pos, left_vel, right_vel);
+    # must match the row width of the 'l' ShareRing passed in as sample_ring
+    SAMPLE_WIDTH = 5
+    # Values per observer sample (time, left_vel, right_vel, s, yaw); must match obsv_ring
+    OBSV_WIDTH = 5
+
     # --------------------------------------------------------------------------
     ### Initialize the object's attributes
     # --------------------------------------------------------------------------
     def __init__(self,
                  col_start, col_done,
                  mtr_enable, abort, motor_data_ready, obsv_data_ready,
-                 time_q, left_pos_q, right_pos_q, left_vel_q, right_vel_q, obsv_time_q, obsv_sL_q, obsv_sR_q, obsv_psi_q, obsv_psi_dot_q,
-                 time_sh, left_pos_sh, right_pos_sh, left_vel_sh, right_vel_sh, obsv_time_sh, obsv_sL_sh, obsv_sR_sh, obsv_psi_sh, obsv_psi_dot_sh,
-                 obsv_left_vel_sh, obsv_right_vel_sh, obsv_s_sh, obsv_yaw_sh, obsv_left_vel_q, obsv_right_vel_q, obsv_s_q, obsv_yaw_q):
+                 sample_ring, obsv_ring,
+                 max_samples, obsv_samples):
 
         # Flags
         self.col_start = col_start
@@ -51,115 +56,144 @@ class DataCollectionTask:
         self.obsv_data_ready = obsv_data_ready
 
         # Shares
-        self.time_sh = time_sh
-        self.left_pos_sh = left_pos_sh
-        self.right_pos_sh = right_pos_sh
-        self.left_vel_sh = left_vel_sh
-        self.right_vel_sh = right_vel_sh
-
-        self.obsv_time_sh = obsv_time_sh
-        self.obsv_sL_sh = obsv_sL_sh
-        self.obsv_sR_sh = obsv_sR_sh
-        self.obsv_psi_sh = obsv_psi_sh
-        self.obsv_psi_dot_sh = obsv_psi_dot_sh
-
-        self.obsv_left_vel_sh = obsv_left_vel_sh
-        self.obsv_right_vel_sh = obsv_right_vel_sh
-        self.obsv_s_sh = obsv_s_sh
-        self.obsv_yaw_sh = obsv_yaw_sh
-
-        # Queues
-        self.time_q = time_q
-        self.left_pos_q = left_pos_q
-        self.right_pos_q = right_pos_q
-        self.left_vel_q = left_vel_q
-        self.right_vel_q = right_vel_q
-
-        self.obsv_time_q = obsv_time_q
-        self.obsv_sL_q = obsv_sL_q
-        self.obsv_sR_q = obsv_sR_q
-        self.obsv_psi_q = obsv_psi_q
-        self.obsv_psi_dot_q = obsv_psi_dot_q
-
-        self.obsv_left_vel_q = obsv_left_vel_q
-        self.obsv_right_vel_q = obsv_right_vel_q
-        self.obsv_s_q = obsv_s_q
-        self.obsv_yaw_q = obsv_yaw_q
-
-        # ensure FSM starts in state S0_INIT
-        self.state = self.S0_INIT
+        # Motor samples arrive as rows of a ShareRing: (time, left_pos, right_pos, left_vel, right_vel)
+        self.sample_ring = sample_ring
+        # Observer samples arrive the same way, or not at all if obsv_ring is None
+        self.obsv_ring = obsv_ring
+
+        # Ring buffers (allocated once; type codes match the shares feeding them)
+        # Samples are stored row-major, one row of SAMPLE_WIDTH (or OBSV_WIDTH)
+        # values per sample, so each sample is copied in with a single slice assignment
+        # Capacities must be powers of two so ring indices wrap with a mask (& (cap - 1)) instead of %
+        self._cap = int(max_samples)
+        self._obsv_cap = int(obsv_samples)
+        for n in (self._cap, self._obsv_cap):
+            if n <= 0 or n & (n - 1):
+                raise ValueError("max_samples and obsv_samples must be powers of two")
+        self._mask = self._cap - 1
+        self._obsv_mask = self._obsv_cap - 1
+        self._head = 0   # index of the oldest sample
+        self._count = 0  # number of samples stored
+        self._width = self.SAMPLE_WIDTH
+        self.sample_buf = array('l', [0] * (self._cap * self._width))
+
+        self._obsv_head = 0
+        self._obsv_count = 0
+        self._obsv_width = self.OBSV_WIDTH
+        self.obsv_buf = array('l', [0] * (self._obsv_cap * self._obsv_width))
+
+        # Bound methods used every S2 tick, looked up once here
+        self._abort_get = abort.get
+        self._read_sample = sample_ring.read_into
+
+        # Buffers start empty, so the FSM can start directly in S1
+        self.state = self.S1_WAIT_FOR_START_COLLECTING
+
+    # --------------------------------------------------------------------------
+    ### HELPER FUNCTIONS
+    # --------------------------------------------------------------------------
+    def reset(self):
+        """Empty both ring buffers (just reset the indices; old data is overwritten)."""
+        self._head = 0
+        self._count = 0
+        self._obsv_head = 0
+        self._obsv_count = 0
+
+    # --------------------------------------------------------------------------
+    def iter_samples(self):
+        """Yield (time, left_pos, right_pos, left_vel, right_vel) tuples, oldest first."""
+        w = self._width
+        for k in range(self._count):
+            row = ((self._head + k) & self._mask) * w
+            yield tuple(self.sample_buf[row:row + w])
+
+    # --------------------------------------------------------------------------
+    def samples_view(self):
+        """Return a memoryview over every stored sample value, oldest first, with no copying.
+
+        Collection stops when the buffer fills rather than overwriting, so the
+        samples are always one contiguous block starting at row 0; the whole log
+        can be handed to e.g. uart.write() or struct unpacking in one go.
+        """
+        return memoryview(self.sample_buf)[:self._count * self._width]
+
+    # --------------------------------------------------------------------------
+    def iter_obsv_samples(self):
+        """Yield (time, left_vel, right_vel, s, yaw) observer tuples, oldest first."""
+        w = self._obsv_width
+        for k in range(self._obsv_count):
+            row = ((self._obsv_head + k) & self._obsv_mask) * w
+            yield tuple(self.obsv_buf[row:row + w])
 
     # --------------------------------------------------------------------------
     ### FINITE STATE MACHINE
+    # --------------------------------------------------------------------------
+    # Each state is a method that returns the next state. run() indexes a
+    # tuple of these handlers by state number instead of walking an if/elif
+    # chain every tick.
+    # --------------------------------------------------------------------------
+    # There is no INIT state: buffers are emptied by reset() when a run starts.
+    # --------------------------------------------------------------------------
+    ### 1: WAITING STATE -------------------------------------------------------
+    def _s1_wait(self):
+        if self.col_start.get():
+            self.reset() # start each run with empty buffers
+            self.sample_ring.clear() # and skip samples from before the run
+            if self.obsv_ring is not None:
+                self.obsv_ring.clear()
+            return self.S2_COLLECTING_DATA # set next state
+        return self.S1_WAIT_FOR_START_COLLECTING
+
+    ### 2: COLLECTING STATE ----------------------------------------------------
+    def _s2_collect(self):
+        # print("Collecting data...")
+        count = self._count
+        cap = self._cap
+        if not self._abort_get() and count < cap and self._obsv_count < self._obsv_cap:
+            # Drain every row the motor task has written since the last tick,
+            # copying each into the next buffer row in one slice assignment
+            head = self._head
+            mask = self._mask
+            width = self._width
+            read_sample = self._read_sample
+            sample_buf = self.sample_buf
+            while count < cap and read_sample(sample_buf, ((head + count) & mask) * width):
+                count += 1
+            self._count = count
+
+            # Same for the observer rows, if the observer is running
+            if self.obsv_ring is not None:
+                obsv_count = self._obsv_count
+                obsv_cap = self._obsv_cap
+                obsv_head = self._obsv_head
+                obsv_mask = self._obsv_mask
+                obsv_width = self._obsv_width
+                read_obsv = self.obsv_ring.read_into
+                obsv_buf = self.obsv_buf
+                while obsv_count < obsv_cap and read_obsv(obsv_buf, ((obsv_head + obsv_count) & obsv_mask) * obsv_width):
+                    obsv_count += 1
+                self._obsv_count = obsv_count
+
+            return self.S2_COLLECTING_DATA
+
+        print("Buffers full or abort signal received, stopping data collection.")
+        # Set flags
+        # self.col_start.put(0)
+        self.col_done.put(1)
+        # self.mtr_enable.put(0)
+        return self.S3_COLLECTION_DONE
+
+    ### 3: DONE STATE ----------------------------------------------------------
+    def _s3_done(self):
+        # Wait for col_start to be cleared
+        if not self.col_start.get():
+            return self.S1_WAIT_FOR_START_COLLECTING
+        return self.S3_COLLECTION_DONE
+
     # --------------------------------------------------------------------------
     def run(self):
+        # Handlers indexed by state number (S1..S3; S0 is never entered)
+        handlers = (None, self._s1_wait, self._s2_collect, self._s3_done)
         while True: # run infinite iterations of the FSM
-            ### 0: INIT STATE --------------------------------------------------
-            if (self.state == self.S0_INIT):
-
-                # Clear queues
-                self.time_q.clear()
-                self.left_pos_q.clear()
-                self.right_pos_q.clear()
-                self.left_vel_q.clear()
-                self.right_vel_q.clear()
-
-                self.obsv_time_q.clear()
-                self.obsv_sL_q.clear()
-                self.obsv_sR_q.clear()
-                self.obsv_psi_q.clear()
-                self.obsv_psi_dot_q.clear()
-
-                self.obsv_left_vel_q.clear()
-                self.obsv_right_vel_q.clear()
-                self.obsv_s_q.clear()
-                self.obsv_yaw_q.clear()
-
-                self.state = self.S1_WAIT_FOR_START_COLLECTING # set next state
-
-            ### 1: WAITING STATE -----------------------------------------------
-            elif (self.state == self.S1_WAIT_FOR_START_COLLECTING):
-                if self.col_start.get():
-                    self.state = self.S2_COLLECTING_DATA # set next state
-
-            ### 2: COLLECTING STATE --------------------------------------------
-            elif (self.state == self.S2_COLLECTING_DATA):
-                # print("Collecting data...")
-                if not self.abort.get() and not self.time_q.full() and not self.obsv_time_q.full():
-                    # Check if sample queue is full
-                    if self.motor_data_ready.get():
-                        self.time_q.put(self.time_sh.get())
-                        self.left_pos_q.put(self.left_pos_sh.get())
-                        self.right_pos_q.put(self.right_pos_sh.get())
-                        self.left_vel_q.put(self.left_vel_sh.get())
-                        self.right_vel_q.put(self.right_vel_sh.get())
-                        self.motor_data_ready.put(0)
-
-                    # if self.obsv_data_ready.get():
-                    #     self.obsv_time_q.put(self.obsv_time_sh.get())
-                    #     # self.obsv_sL_q.put(self.obsv_sL_sh.get())
-                    #     # self.obsv_sR_q.put(self.obsv_sR_sh.get())
-                    #     # self.obsv_psi_q.put(self.obsv_psi_sh.get())
-                    #     # self.obsv_psi_dot_q.put(self.obsv_psi_dot_sh.get())
-                    #     # self.obsv_data_ready.put(0)
-                    #     self.obsv_left_vel_q.put(self.obsv_left_vel_sh.get())
-                    #     self.obsv_right_vel_q.put(self.obsv_right_vel_sh.get())
-                    #     self.obsv_s_q.put(self.obsv_s_sh.get())
-                    #     self.obsv_yaw_q.put(self.obsv_yaw_sh.get())
-                    #     self.obsv_data_ready.put(0)
-
-                else:
-                    print("Queues full or abort signal received, stopping data collection.")
-                    # Set flags
-                    # self.col_start.put(0)
-                    self.col_done.put(1)
-                    # self.mtr_enable.put(0)
-                    self.state = self.S3_COLLECTION_DONE
-            
-            ### 3: DONE STATE --------------------------------------------------
-            elif (self.state == self.S3_COLLECTION_DONE):
-                # Wait for col_start to be cleared
-                if not self.col_start.get():
-                    self.state = self.S1_WAIT_FOR_START_COLLECTING
-
+            self.state = handlers[self.state]()
             yield self.state
\ No newline at end of file
@@ -6,7 +6,6 @@
 # This task predicts the future state of the system using a system model and sensor inputs
 # ==============================================================================
 
-from pyb import millis
 from ulab import numpy as np
 from math import pi
 
@@ -17,48 +16,39 @@ class StateEstimationTask:
     S0_INIT = 0
     S1_ESTIMATING = 1
 
+    # Robot geometry (immutable, so class-level rather than per-instance)
+    R = 0.035  # wheel radius (m)
+    W = 0.141  # distance between wheels (m)
+    COUNT2RAD = 2*pi/(3952/33*12)  # Radians per encoder count (gear ratio * motor CPR, ~1437 counts/rev)
+    M_PER_COUNT = COUNT2RAD * R  # Wheel travel per encoder count (m)
+
     ### Initialize the object's attributes
     # --------------------------------------------------------------------------
     def __init__(self,
                  run_observer,
-                 start_time, obsv_data_ready,
-                 obsv_time_sh, left_pos_sh, right_pos_sh, 
-                 left_vel_sh, right_vel_sh,
+                 obsv_data_ready,
+                 motor_sample,
                  psi_sh, psi_dot_sh, left_eff_sh, right_eff_sh,
                  battery,
-                 obsv_sL_sh, obsv_sR_sh, obsv_psi_sh, obsv_psi_dot_sh,
-                 obsv_left_vel_sh, obsv_right_vel_sh, obsv_s_sh, obsv_yaw_sh):
+                 obsv_sample, obsv_ring=None):
 
         # Shares
-        self.left_pos_sh = left_pos_sh
-        self.right_pos_sh = right_pos_sh
-        self.left_vel_sh = left_vel_sh
-        self.right_vel_sh = right_vel_sh
+        self.motor_sample = motor_sample # ShareBank: (time, left_pos, right_pos, left_vel, right_vel)
         self.psi_sh = psi_sh
         self.psi_dot_sh = psi_dot_sh
         self.left_eff_sh = left_eff_sh
         self.right_eff_sh = right_eff_sh
         self.battery = battery
 
-        self.start_time = start_time
-        self.obsv_time_sh = obsv_time_sh
-        self.obsv_sL_sh = obsv_sL_sh
-        self.obsv_sR_sh = obsv_sR_sh
-        self.obsv_psi_sh = obsv_psi_sh
-        self.obsv_psi_dot_sh = obsv_psi_dot_sh
-        self.obsv_left_vel_sh = obsv_left_vel_sh
-        self.obsv_right_vel_sh = obsv_right_vel_sh
-        self.obsv_s_sh = obsv_s_sh
-        self.obsv_yaw_sh = obsv_yaw_sh
+        # Observer output: (time, left_vel, right_vel, s, yaw), published as one
+        # ShareBank snapshot and, if given, one ShareRing row for data collection
+        self.obsv_sample = obsv_sample
+        self.obsv_ring = obsv_ring
 
         # Flags
         self.run_observer = run_observer
         self.obsv_data_ready = obsv_data_ready
 
-        self.r = 0.035  # wheel radius (m)
-        self.w = 0.141  # distance between wheels (m)
-        self.count2rad = 2*pi/1440   # Conversion factor
-
         self.V_nom = self.battery.read_voltage()
 
         self.A_D = np.array([[0, 0, 0.1331*100, 0],
@@ -71,10 +61,10 @@ class StateEstimationTask:
                              [0, 0, 0.5, 0.5, 0, 0],
                              [0, 0, -0.0698, 0.0698, 0.9902, 0.0001]])
         
-        self.C = np.array([[0, 0, 1, -self.w/2],
-                           [0, 0, 1, self.w/2],
+        self.C = np.array([[0, 0, 1, -self.W/2],
+                           [0, 0, 1, self.W/2],
                            [0, 0, 0, 1],
-                           [-self.r/self.w, self.r/self.w, 0, 0]])
+                           [-self.R/self.W, self.R/self.W, 0, 0]])
         
         self.x_k = np.array([[0],
                              [0], 
@@ -100,7 +90,6 @@ class StateEstimationTask:
                 # Wait for signal from motor task to start observing
                 run_observer = self.run_observer.get()
                 if run_observer:
-                    motor_task_start_time = self.start_time.get()
                     self.state = self.S1_ESTIMATING # set next state
                 else:
                     yield self.state
@@ -113,8 +102,8 @@ class StateEstimationTask:
                 V_R = self.right_eff_sh.get() * self.V_nom / 100.0
 
                 # Determine values for output state vector, y
-                s_L = self.left_pos_sh.get() * self.count2rad * self.r # Left wheel displacement (m)
-                s_R = self.right_pos_sh.get() * self.count2rad * self.r # Right wheel displacement (m)
+                s_L = self.motor_sample.get(1) * self.M_PER_COUNT # Left wheel displacement (m)
+                s_R = self.motor_sample.get(2) * self.M_PER_COUNT # Right wheel displacement (m)
                 psi = self.psi_sh.get() / 1000
                 psi_dot = self.psi_dot_sh.get() / 1000
 
@@ -132,9 +121,8 @@ class StateEstimationTask:
                 # Determine output for current state
                 self.y_k = np.dot(self.C, self.x_k)
 
-                # Put time in share
-                t = millis() - motor_task_start_time
-                self.obsv_time_sh.put(int(t))
+                # Time of the motor sample used above (ms since enable)
+                t = self.motor_sample.get(0)
                 
                 # Scale values
                 # obsv_sL = self.y_k[0,0] * 1e3       # Has units m / 1000
@@ -142,11 +130,6 @@ class StateEstimationTask:
                 # obsv_psi = self.y_k[2,0] * 1e6          # Has units rad / 1e6
                 # obsv_psi_dot = self.y_k[3,0] * 1e6      # Has units rad/s / 1e6
 
-                # # Put observer values in shares
-                # self.obsv_sL_sh.put(int(obsv_sL))
-                # self.obsv_sR_sh.put(int(obsv_sR))
-                # self.obsv_psi_sh.put(int(obsv_psi))
-                # self.obsv_psi_dot_sh.put(int(obsv_psi_dot))
 
                 # Get estimated state
                 obsv_left_vel = self.x_kplus1[0,0] * 1e3    # Has units rad/s / 1e3
@@ -154,10 +137,11 @@ class StateEstimationTask:
                 obsv_s = self.x_kplus1[2,0] * 1e3           # Has units m / 1e3
                 obsv_yaw = self.x_kplus1[3,0] * 1e3         # Has units rad / 1e3
 
-                self.obsv_left_vel_sh.put(int(obsv_left_vel))
-                self.obsv_right_vel_sh.put(int(obsv_right_vel))
-                self.obsv_s_sh.put(int(obsv_s))
-                self.obsv_yaw_sh.put(int(obsv_yaw))
+                # Publish the whole observer sample at once
+                sample = (t, int(obsv_left_vel), int(obsv_right_vel), int(obsv_s), int(obsv_yaw))
+                self.obsv_sample.write(sample)
+                if self.obsv_ring is not None:
+                    self.obsv_ring.write(sample)
                 
                 # Set flag for data task
                 self.obsv_data_ready.put(1)
@@ -15,23 +15,37 @@ class IMU:
     '''A IMU driver interface that works with an IMU using a SCL, SDA, RST inputs such as the BNO055'''
 
     class reg:
-        # Data registers and struct format strings
-        ACC_DATA_ALL  = (0x08, b"<hhh")     # x, y, z (6 bytes)
-        EULER_DATA_ALL = (0x1A, b"<hhh")     # heading, roll, pitch (6 bytes)
-        GYRO_DATA_ALL  = (0x14, b"<hhh")     # x, y, z (6 bytes)
-        CALIB_STAT     = (0x35, b"<B")       # single byte
-        CALIB_PROFILE  = (0x55, b"<hhhhhhhhhhh")  # 11 x 16-bit values (22 bytes)
-        OPR_MODE       = (0x3D, b"<B")
-        SYS_TRIGGER    = (0x3F, b"<B")
-        AXIS_MAP_CONFIG = (0x41, b"<B")
-        AXIS_MAP_SIGN   = (0x42, b"<B")
-        INT_MASK       = (0x0F, b"<B")
-        INT_ENABLE     = (0x10, b"<B")
-
-    def __init__(self, i2c):
-        '''Initialize an IMU object'''
+        # Data registers, struct format strings, and byte counts
+        # (sizes are computed once here so reads don't call calcsize())
+        ACC_DATA_ALL  = (0x08, b"<hhh", calcsize(b"<hhh"))     # x, y, z (6 bytes)
+        EULER_DATA_ALL = (0x1A, b"<hhh", calcsize(b"<hhh"))     # heading, roll, pitch (6 bytes)
+        GYRO_DATA_ALL  = (0x14, b"<hhh", calcsize(b"<hhh"))     # x, y, z (6 bytes)
+        # accel, mag, gyro, euler in one auto-increment burst (24 bytes)
+        ALL_DATA       = (0x08, b"<hhhhhhhhhhhh", calcsize(b"<hhhhhhhhhhhh"))
+        CALIB_STAT     = (0x35, b"<B", calcsize(b"<B"))       # single byte
+        CALIB_PROFILE  = (0x55, b"<hhhhhhhhhhh", calcsize(b"<hhhhhhhhhhh"))  # 11 x 16-bit values (22 bytes)
+        OPR_MODE       = (0x3D, b"<B", calcsize(b"<B"))
+        SYS_TRIGGER    = (0x3F, b"<B", calcsize(b"<B"))
+        AXIS_MAP_CONFIG = (0x41, b"<B", calcsize(b"<B"))
+        AXIS_MAP_SIGN   = (0x42, b"<B", calcsize(b"<B"))
+        INT_MASK       = (0x0F, b"<B", calcsize(b"<B"))
+        INT_ENABLE     = (0x10, b"<B", calcsize(b"<B"))
+
+    def __init__(self, i2c, debug=False):
+        '''Initialize an IMU object
+
+        i2c must be a hardware pyb.I2C in controller mode (see main.py, 400 kHz).
+        Register reads rely on its mem_read(), which writes the register address
+        and reads the data in one repeated-start transaction.
+
+        Set debug=True to print informational messages (each print is a
+        blocking serial write, so these are off by default).
+        '''
+        if not hasattr(i2c, 'mem_read'):
+            raise ValueError("IMU requires a hardware I2C object with mem_read()/mem_write()")
         self._i2c = i2c
-        self._buf = bytearray((0 for n in range(22))) # buffer for reading data
+        self.debug = debug
+        self._buf = bytearray((0 for n in range(24))) # buffer for reading data (sized for ALL_DATA burst)
         self._current_mode = "config"  # Start in config mode
 
         self._DEV_ADDR = 0x28
@@ -53,16 +67,10 @@ class IMU:
             "ndof":         {"code": 0x0C, "name": "NDOF (Full 9-DOF Fusion)"}
         }
         # Enable interrupts for data ready
-        # msk = 0b00000001
-        # buf = memoryview(self._buf)[:1]         # buf is type bytes of length 1
-        # self._i2c.mem_read(buf, self._DEV_ADDR, self.reg.INT_ENABLE[0], timeout=100)
-        # val = buf[0]        # convert bytes to int
-        # val |= msk  # Set bit 0
-        # self._i2c.mem_write(buf, self._DEV_ADDR, self.reg.INT_ENABLE[0], timeout=100)
-        # self._i2c.mem_read(buf, self._DEV_ADDR, self.reg.INT_MASK[0], timeout=100)
-        # val = buf[0]
-        # val |= msk  # Set bit 0
-        # self._i2c.mem_write(buf, self._DEV_ADDR, self.reg.INT_MASK[0], timeout=100)
+        # Bit 0 is the only interrupt we use, so write it directly instead of
+        # doing a read-modify-write (saves one I2C transaction per register).
+        # self._i2c.mem_write(b'\x01', self._DEV_ADDR, self.reg.INT_ENABLE[0], timeout=100)
+        # self._i2c.mem_write(b'\x01', self._DEV_ADDR, self.reg.INT_MASK[0], timeout=100)
 
         # Reset interrupt
 
@@ -75,15 +83,15 @@ class IMU:
 
     # --------------------------------------------------------------------------
     def _read_reg(self, reg):
-        '''Generic register read method using calcsize() and unpack_from()
+        '''Generic register read method using the precomputed size and unpack_from()
 
         Added optional `debug` flag to measure and print the time spent in the
         underlying I2C `mem_read` call. This helps identify whether the
         communication is the bottleneck.
         '''
-        # addr, fmt = reg
-        # Determine number of bytes to read
-        length = calcsize(reg[1])
+        # addr, fmt, size = reg
+        # Number of bytes to read (precomputed in the reg table)
+        length = reg[2]
         # Create a memoryview object of the right size (no extra allocation)
         buf = memoryview(self._buf)[:length]
 
@@ -140,13 +148,21 @@ class IMU:
         accel_x, accel_y, accel_z, mag_x, mag_y, mag_z, \
         gyro_x, gyro_y, gyro_z, accel_r, mag_r = coeffs
 
+        # Restore the previous mode before touching the filesystem so the IMU
+        # spends as little time as possible in CONFIG mode. Mode switches don't
+        # use self._buf, so the raw bytes read above are still intact.
+        if prev_mode != "config":
+            # print(f"Restoring previous mode: {prev_mode}")
+            self.set_operation_mode(prev_mode)
+
         if save_to_file:
-            # Save the raw 22 bytes to a file
-            length = calcsize(self.reg.CALIB_PROFILE[1])
-            buf = memoryview(self._buf)[:length]
-            with open("imu_cal.bin", 'wb') as f: # 'write binary' mode
-                f.write(buf)
-        # print("Calibration coefficients saved to imu_cal.bin")
+            # Save the raw 22 bytes straight from the read buffer
+            try:
+                with open("imu_cal.bin", 'wb') as f: # 'write binary' mode
+                    f.write(memoryview(self._buf)[:self.reg.CALIB_PROFILE[2]])
+                # print("Calibration coefficients saved to imu_cal.bin")
+            except OSError as e:
+                print(f"Failed to save IMU calibration to imu_cal.bin: {e}")
 
         data = {
             "accel_offset": (accel_x, accel_y, accel_z),
@@ -156,10 +172,6 @@ class IMU:
             "mag_radius":   mag_r
         }
 
-        if prev_mode != "config":
-            # print(f"Restoring previous mode: {prev_mode}")
-            self.set_operation_mode(prev_mode)
-
         return data
 
     # --------------------------------------------------------------------------
@@ -168,22 +180,29 @@ class IMU:
         # MUST be in config mode to write calibration coefficients
         prev_mode = self._current_mode
         if prev_mode != "config":
-            print("Switching to CONFIG mode to write calibration coefficients")
+            if self.debug:
+                print("Switching to CONFIG mode to write calibration coefficients")
             self.set_operation_mode("config")
 
+        # Read the file straight into the I2C buffer rather than allocating a
+        # new bytes object; one spare byte catches a file that is too long
+        size = self.reg.CALIB_PROFILE[2]
         with open("imu_cal.bin", 'rb') as f: # 'read binary' mode
-            coeffs = f.read()
-        if len(coeffs) != calcsize(self.reg.CALIB_PROFILE[1]):
+            n = f.readinto(memoryview(self._buf)[:size + 1])
+        if n != size:
             raise ValueError("Calibration file must contain exactly 22 bytes.")
+        coeffs = memoryview(self._buf)[:size]
         # print("Calibration coefficients read from imu_cal.bin")
         # Write the coefficients to the IMU
         # print("Writing calibration coefficients to IMU")
         self._i2c.mem_write(coeffs, self._DEV_ADDR, self.reg.CALIB_PROFILE[0], timeout=100)
         delay(20) # Small delay for write to complete
-        print("Calibration coefficients written to IMU")
+        if self.debug:
+            print("Calibration coefficients written to IMU")
 
         if prev_mode != "config":
-            print(f"Restoring previous mode: {prev_mode}")
+            if self.debug:
+                print(f"Restoring previous mode: {prev_mode}")
             self.set_operation_mode(prev_mode)
 
     # --------------------------------------------------------------------------
@@ -213,6 +232,21 @@ class IMU:
         # Convert to m/s^2 (1 m/s^2 = 16 LSB)
         return (x / 100, y / 100, z / 100)
     # --------------------------------------------------------------------------
+    def read_all(self):
+        '''Return (euler, angular velocity, acceleration) from a single I2C burst.
+
+        The BNO055 auto-increments the register address, so one 24-byte read
+        starting at ACC_DATA covers accel, mag, gyro, and Euler data. Units
+        match read_euler_angles(), read_angular_velocity(), and
+        read_acceleration().
+        '''
+        ax, ay, az, _, _, _, gx, gy, gz, heading, roll, pitch = self._read_reg(self.reg.ALL_DATA)
+        euler = (-1 * (heading / 16) + 360, roll / 16.0, pitch / 16.0)
+        gyro = (gx / 16.0, gy / 16.0, gz / 16.0)
+        accel = (ax / 100, ay / 100, az / 100)
+        return (euler, gyro, accel)
+
+    # --------------------------------------------------------------------------
     def reset(self):
         '''Reset the IMU'''
         # The IMU reset is performed by setting bit 5 of the SYS_TRIGGER register, which we access via the reset_addr
@@ -7,6 +7,7 @@ This module defines an IRArray class that manages an array of IR sensors. It sup
 from os import listdir
 from pyb import Pin, ADC, Timer
 import array
+import micropython
 
 class IRArray:
     """
@@ -20,7 +21,8 @@ class IRArray:
                  tim_num: int,
                  samples: int,
                  IR_pins,
-                 sensor_indices=None):
+                 sensor_indices=None,
+                 debug=False):
         """
         Args:
             tim_num: Timer number for creating a timer for ADC sampling
@@ -28,9 +30,11 @@ class IRArray:
             IR_pins: List of Pin.cpu.<X> constants (order: left -> right)
             sensor_indices: Optional list of physical board indices corresponding to the IR_pins list
                             (example: [1,3,5,7,9,11] if only odd sensors are populated). If None, indices default to [1..N] in the given order.
+            debug: If True, print informational messages (errors and calibration tables are always printed)
         """
         self.tim_obj = Timer(tim_num, freq = 20000) # 20 kHz timer for sampling from IR sensors
         self.samples = int(samples)
+        self.debug = debug
         # Create ADCs internally in the driver from IR_pins specified in main.py
         self.adcs = [ADC(Pin(p)) for p in IR_pins]
         self.num = len(self.adcs)
@@ -45,12 +49,36 @@ class IRArray:
                 raise ValueError("sensor_indices length must match IR_pins length")
             self.sensor_index = list(sensor_indices)
 
+        # Geometry of the index set, fixed once the indices are known
+        idx_min = min(self.sensor_index)
+        idx_max = max(self.sensor_index)
+        self._center = 0.5 * (idx_min + idx_max)
+        # Half the index span, for normalizing centroid offsets to [-1, 1]
+        self.half_span = 0.5 * (idx_max - idx_min) if idx_max > idx_min else 1.0
+
+        # Per-channel values used every read are kept as parallel float arrays
+        # (one contiguous buffer each) rather than lists of float objects
+
+        # Sensor indices relative to the array center, so the centroid sum
+        # yields the line offset from center directly
+        self._centered_idx = array.array('f', [idx - self._center for idx in self.sensor_index])
+
         # Calibration data
         self.black = [0.0] * self.num
         self.white = [0.0] * self.num
 
+        # Per-channel normalization terms: n = r*_inv_denom[i] + _w_off[i]
+        # (recomputed only when calibration data changes)
+        self._inv_denom = array.array('f', [0.0] * self.num)
+        self._w_off = array.array('f', [0.0] * self.num)
+
         # Last normalized read (0..1 where 1 ~ black line)
-        self.norm = [0.0] * self.num
+        self.norm = array.array('f', [0.0] * self.num)
+
+        # Calibration sample buffers (allocated once; read_timed_multi() overwrites them)
+        self._cal_bufs = tuple(array.array('H', [0] * self.samples) for _ in range(self.num))
+        self._cal_avgs = [0.0] * self.num
+        self._adcs_tuple = tuple(self.adcs)
 
     # ----------------------------------------------------------------------
     def calibrate(self, color: str):
@@ -65,10 +93,14 @@ class IRArray:
 
         Returns:
             avgs: List containing average readings for each sensor after calibration
+                  (reused between calls; copy it if it needs to be kept)
         """
-        bufs = [array.array('H', [0] * self.samples) for _ in range(self.num)]
-        ADC.read_timed_multi(tuple(self.adcs), tuple(bufs), self.tim_obj)
-        avgs = [sum(b) / len(b) for b in bufs]
+        bufs = self._cal_bufs
+        ADC.read_timed_multi(self._adcs_tuple, bufs, self.tim_obj)
+        avgs = self._cal_avgs
+        inv_n = 1.0 / self.samples
+        for i in range(self.num):
+            avgs[i] = sum(bufs[i]) * inv_n
 
         if color == 'b':
             for i, v in enumerate(avgs):
@@ -80,7 +112,8 @@ class IRArray:
                 self.white[i] = float(v)
             label = "WHITE"
             self.white_cal = True
-        
+        self._recompute_scale()
+
         print("\r\n[IR CALIBRATION] {} averages:".format(label))
         print(" Index | Average (counts)")
         print("-------+------------------")
@@ -112,32 +145,44 @@ class IRArray:
                 if len(black_vals) == self.num and len(white_vals) == self.num:
                     self.black = black_vals
                     self.white = white_vals
-                    print("Black and White calibration data loaded.")
+                    self._recompute_scale()
+                    if self.debug:
+                        print("Black and White calibration data loaded.")
                 else:
                     print("[IR CALIBRATION] Calibration file sensor count mismatch; using defaults")
             else:
                 print("[IR CALIBRATION] Calibration file format error; using defaults")
     
     # ----------------------------------------------------------------------
+    def _recompute_scale(self):
+        """Precompute per-channel scale and offset from the black/white calibration."""
+        for i in range(self.num):
+            d = self.black[i] - self.white[i]
+            inv = 1.0 / d if d != 0 else 0.0
+            self._inv_denom[i] = inv
+            self._w_off[i] = -self.white[i] * inv
+
+    # ----------------------------------------------------------------------
+    @micropython.native
     def read(self):
         """
         Single-shot read on all channels, normalized to [0,1].
         0 ~ white (background), 1 ~ black (line).
 
-        Returns: list of floats, same order as IR_pins / sensor_index.
+        Returns: array of floats, same order as IR_pins / sensor_index.
+                 This is self.norm, which is updated in place on every read.
         """
-        out = []
-        for i, adc in enumerate(self.adcs):
-            r = adc.read()
-            b = self.black[i]
-            w = self.white[i]
-            denom = (b - w)
-            n = (r - w) / denom if denom != 0 else 0.0
+        # Local references avoid repeated attribute lookups inside the loop
+        adcs = self.adcs
+        inv_denom = self._inv_denom
+        w_off = self._w_off
+        norm = self.norm # written in place; no new list per read
+        for i in range(self.num):
+            n = adcs[i].read() * inv_denom[i] + w_off[i]
             if n < 0.0: n = 0.0
             if n > 1.0: n = 1.0
-            out.append(n)
-        self.norm = out
-        return self.norm
+            norm[i] = n
+        return norm
 
     # ----------------------------------------------------------------------
     def get_centroid(self):
@@ -148,21 +193,58 @@ class IRArray:
             centroid: float in the index space (not 0..1; uses sensor_index values)
             seen: bool indicating if any signal was seen (sum(norm) > small eps)
         """
-        self.read()
-        total = sum(self.norm)
+        total, offset_sum = self._read_and_centroid()
         if total <= 1e-6:
             return 0.0, False
 
-        weighted = 0.0
-        for idx, val in zip(self.sensor_index, self.norm):
-            weighted += idx * val
+        return self.center_index() + (offset_sum / total), True
 
-        return (weighted / total), True
+    # ----------------------------------------------------------------------
+    def get_centroid_error(self):
+        """
+        Same as get_centroid(), but returns the centroid's offset from
+        center_index() directly (negative = left of center).
+        Returns:
+            (error, seen)
+        """
+        total, offset_sum = self._read_and_centroid()
+        if total <= 1e-6:
+            return 0.0, False
+
+        return (offset_sum / total), True
+
+    # ----------------------------------------------------------------------
+    @micropython.native
+    def _read_and_centroid(self):
+        """
+        Single-shot read fused with the centroid sums, so each sample is
+        normalized and accumulated in one pass. Updates self.norm in place.
+        Compiled to native code since the steering task calls it every tick.
+
+        Returns:
+            (total, offset_sum): sum(norm) and sum((sensor_index[i] - center) * norm[i])
+        """
+        adcs = self.adcs
+        inv_denom = self._inv_denom
+        w_off = self._w_off
+        index = self._centered_idx
+        norm = self.norm
+        total = 0.0
+        weighted = 0.0
+        for i in range(self.num):
+            n = adcs[i].read() * inv_denom[i] + w_off[i]
+            if n < 0.0: n = 0.0
+            if n > 1.0: n = 1.0
+            norm[i] = n
+            total += n
+            weighted += index[i] * n
+        return total, weighted
 
     # ----------------------------------------------------------------------
     def center_index(self):
         """
         Returns the ideal center location in index space.
         For arbitrary index sets, use average of min and max (center of span).
+        (Computed once in __init__.)
         """
-        return 0.5 * (min(self.sensor_index) + max(self.sensor_index))
\ No newline at end of file
+        return self._center
\ No newline at end of file
@@ -24,6 +24,7 @@ class Battery:
         """Initializes the Battery object with ADC pin and voltage divider values."""
         self.adc = ADC(Pin(adc_pin))
         self.scale = (self.R_1_OHM + self.R_2_OHM) / self.R_2_OHM
+        self._v_scale = self.V_REF / 4095.0 * self.scale  # ADC counts -> battery volts
         self.warned = False  # flag so we only warn "low battery" once
         self._cached_voltage = None  # Cache for the last read voltage
         self._cached_gain = None     # Cache for the last computed droop gain
@@ -31,9 +32,8 @@ class Battery:
     #---------------------------------------------------------------------------
     def read_voltage(self):
         """Reads the raw ADC value and computes the actual battery voltage."""
-        raw_adc = self.adc.read()  # Read raw ADC value (0-4095)
-        V_adc = (raw_adc / 4095.0) * self.V_REF  # Measured voltage at ADC pin
-        V_batt = V_adc * self.scale  # Compute actual battery voltage
+        # Raw ADC value (0-4095) scaled to the pin voltage and through the divider in one multiply
+        V_batt = self.adc.read() * self._v_scale
         if V_batt < self.LOW_BATT_THRESHOLD and not self.warned:
             print("Warning: Battery voltage low ({:.2f} V). Consider replacing batteries.".format(V_batt))
             self.warned = True  # Set flag to avoid repeated warnings
@@ -4,8 +4,18 @@
 
 This module defines a ClosedLoop class that implements a PI controller for velocity control of a motor. It includes methods to reset the controller state and compute the control output based on feedback velocity and battery voltage for droop compensation."""
 
-from time import ticks_diff, ticks_ms
+from time import ticks_diff, ticks_us
 import math
+import micropython
+from micropython import const
+
+# Radians per encoder count, bound once at module scope so run() does a
+# global load instead of an attribute lookup: 2*pi / (gear ratio * motor CPR)
+_RAD_PER_COUNT = 2 * math.pi / (3952/33 * 12)
+
+# Set to 1 to print per-tick debug output; while it's 0 the compiler drops
+# the debug prints entirely, so they cost nothing in the control loop
+_DEBUG = const(0)
 
 class ClosedLoop:
     """Proportional-Integral (PI) controller for velocity control in rad/s.
@@ -23,7 +33,7 @@ class ClosedLoop:
     GEAR_RATIO = 3952/33  # Gear ratio of motor to wheel (~120)
     CPR_MOTOR = 12 # Counts per rev of the motor shaft (before gearbox)
     CPR_WHEEL = GEAR_RATIO*CPR_MOTOR  # Counts per rev of the wheel (~1440)
-    RAD_PER_COUNT = 2 * math.pi / CPR_WHEEL  # Radians per count
+    RAD_PER_COUNT = _RAD_PER_COUNT  # Radians per count
     # --------------------------------------------------------------------------
 
     def __init__(self,
@@ -37,18 +47,28 @@ class ClosedLoop:
         self.sp_sh = sp_sh
         self.effort_min, self.effort_max = effort_limits
         self.integrator = 0.0
-        self.last_time = ticks_ms()
+        self.last_time = ticks_us()
         self.output = 0.0
         self.last_output = 0.0
 
         self.battery = battery  # battery object for droop compensation
 
+        # Bound share getters, looked up once here instead of every tick
+        self._kp_get = kp.get
+        self._ki_get = ki.get
+        self._sp_get = sp_sh.get
+
+        # Ki and the 1/Ki used by the anti-windup clamp, recomputed only when Ki changes
+        self._ki = None
+        self._inv_ki = 0.0
+
     def reset(self):
         """Reset controller integrator and state."""
         self.integrator = 0.0
         self.output = 0.0
-        self.last_time = ticks_ms()
+        self.last_time = ticks_us()
 
+    @micropython.native
     def run(self, fb):
         """Compute control output (effort %) from velocity feedback and measured battery voltage.
         
@@ -59,48 +79,61 @@ class ClosedLoop:
             u: Control effort output (%).
         """
         
-        now = ticks_ms()
-        dt_ms = ticks_diff(now, self.last_time)
+        # Time the step in microseconds, so the integrator sees the real
+        # tick-to-tick spacing rather than a whole number of milliseconds
+        now = ticks_us()
+        dt_us = ticks_diff(now, self.last_time)
         
-        # If task paused too long, hold last output instead of cutting to zero
-        if dt_ms > 1000:
+        # If task paused too long, hold last output instead of cutting to zero,
+        # and clear the integrator so stale state doesn't cause a surge on resume
+        if dt_us > 1000000:
             self.last_time = now # reset time
+            self.integrator = 0.0
             return self.last_output # hold last output
         
-        dt = dt_ms / 1000.0  # Convert to seconds
+        dt = dt_us * 1e-6  # Convert to seconds (multiply instead of a per-tick float divide)
         self.last_time = now
 
         # Convert velocity from count/s to rad/s
-        fb *= self.RAD_PER_COUNT
+        fb *= _RAD_PER_COUNT
         
+        # Read gains and setpoint once per tick
+        kp = self._kp_get()
+        ki = self._ki_get()
+
         # --- Core PI control ---
-        error = self.sp_sh.get() - fb
+        error = self._sp_get() - fb
 
         # Calculate tentative integrator 
         self.integrator += (error * dt)
         
         # Anti-windup: Only update intgrator if it doesn't result in over-saturation
         # Simple clamping method
-        max_integral = (self.effort_max - self.kp.get() * error) / (self.ki.get() + 1e-6)
-        min_integral = (self.effort_min - self.kp.get() * error) / (self.ki.get() + 1e-6)
+        p_term = kp * error
+        if ki != self._ki:
+            self._ki = ki
+            self._inv_ki = 1.0 / (ki + 1e-6)
+        inv_ki = self._inv_ki
+        max_integral = (self.effort_max - p_term) * inv_ki
+        min_integral = (self.effort_min - p_term) * inv_ki
         self.integrator = max(min(self.integrator, max_integral), min_integral)
         
         # Base PI output (without droop compensation)
-        u = self.kp.get() * error + self.ki.get() * self.integrator
+        u = p_term + ki * self.integrator
 
         # --- Battery droop compensation ---
+        # droop_gain() returns a cached value; skip the multiply when there is
+        # no battery or the gain is unity (no compensation)
         if self.battery is not None:
             gain = self.battery.droop_gain()  # Calls the battery method to compute a gain for droop compensation
-        else:
-            gain = 1.0  # No compensation
-        
-        # Compute final output with droop compensation
-        u *= gain # apply droop gain block to controller output
+            if gain != 1.0:
+                u *= gain # apply droop gain block to controller output
         
         # Final clamp on output (clamp effort to safe limits)
         u = max(min(u, self.effort_max), self.effort_min)
 
-        # print(f"CL Controller | SP: {self.sp_sh.get():.2f}, FB: {fb:.2f}, Error: {error:.2f}, Effort: {u:.2f}, Gain: {gain:.3f}")
+        if _DEBUG:
+            print(f"CL Controller | SP: {self.sp_sh.get():.2f}, FB: {fb:.2f}, Error: {error:.2f}, Effort: {u:.2f}")
         
         self.output = u
         self.last_output = u
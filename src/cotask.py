@@ -140,6 +140,7 @@ class Task:
     #  up to the next @c yield() and then returns @c True.
     # 
     #  @return @c True if the task ran or @c False if it did not
+    @micropython.native
     def schedule(self) -> bool:
         if self.ready():
 
@@ -214,6 +215,17 @@ class Task:
         return self.go_flag
 
 
+    ## This method returns the time until this task's next timed run. Lower
+    #  priority tasks can use it to check that a slow job (such as a garbage
+    #  collection) will finish before this task needs the CPU again.
+    #  @return Microseconds until the next run (zero or less if the task is
+    #          already due), or @c None if the task isn't run on a timer
+    def time_to_next_run(self):
+        if self.period is None:
+            return None
+        return utime.ticks_diff(self._next_run, utime.ticks_us())
+
+
     ## This method sets the period between runs of the task to the given
     #  number of milliseconds, or @c None if the task is triggered by calls
     #  to @c go() rather than time.
@@ -308,12 +320,18 @@ class TaskList:
         #  that priority. 
         self.pri_list = []
 
+        ## Set by @c freeze() once no more tasks may be appended
+        self._frozen = False
+
 
     ## Append a task to the task list. The list will be sorted by task 
     #  priorities so that the scheduler can quickly find the highest priority
     #  task which is ready to run at any given time. 
     #  @param task The task to be appended to the list
     def append(self, task):
+        if self._frozen:
+            raise RuntimeError("task list is frozen")
+
         # See if there's a tasklist with the given priority in the main list
         new_pri = task.priority
         for pri in self.pri_list:
@@ -334,6 +352,18 @@ class TaskList:
         self.pri_list.sort(key=lambda pri: pri[0], reverse=True)
 
 
+    ## Fix the set of tasks once all of them have been appended.
+    #
+    #  The task set of a program is normally known before the scheduler is
+    #  started, so the sorted list of priority lists is turned into a tuple,
+    #  which the schedulers can walk without any further changes to its
+    #  shape. Tasks can't be appended after this has been called; trying
+    #  to do so raises a @c RuntimeError.
+    def freeze(self):
+        self.pri_list = tuple(self.pri_list)
+        self._frozen = True
+
+
     ## Run tasks in order, ignoring the tasks' priorities.
     #
     #  This scheduling method runs tasks in a round-robin fashion. Each
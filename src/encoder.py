@@ -7,8 +7,23 @@ This module defines an Encoder class that interfaces with quadrature encoders us
 
 from pyb import Pin, Timer
 from time import ticks_us, ticks_diff   # Use to get dt value in update()
+import micropython
+from micropython import const
+import stm
 import math
 
+# 16-bit timer counter constants (const() names are inlined by the compiler,
+# so update() does no attribute lookups or arithmetic to get them)
+_AR = const(65535)          # Auto-reload value for 16-bit timer
+_HALF_RANGE = const(32768)  # (AR + 1) // 2
+_COUNT_MASK = const(0xFFFF) # AR as a bit mask
+
+# Unit conversion factors (const() only takes ints, so these are plain module
+# globals, evaluated once at import: 2*pi / (gear ratio * motor CPR) and
+# that times the 35 mm wheel radius)
+_RAD_PER_COUNT = 2 * math.pi / (3952/33 * 12)
+_MM_PER_COUNT = _RAD_PER_COUNT * 35
+
 class Encoder:
     '''A quadrature encoder decoding interface encapsulated in a Python class. Provides position and velocity.'''
 
@@ -17,8 +32,12 @@ class Encoder:
     GEAR_RATIO = 3952/33  # Gear ratio of motor to wheel (~120)
     CPR_MOTOR = 12 # Counts per rev of the motor shaft (before gearbox)
     CPR_WHEEL = GEAR_RATIO*CPR_MOTOR  # Counts per rev of the wheel (~1440)
-    RAD_PER_COUNT = 2 * math.pi / CPR_WHEEL  # Radians per count
+    RAD_PER_COUNT = _RAD_PER_COUNT  # Radians per count
     WHEEL_RADIUS_MM = 35  # Wheel radius in mm
+    MM_PER_COUNT = _MM_PER_COUNT  # Millimeters of wheel travel per count
+    # Unit conversion factors from counts, looked up by get_position()/get_velocity()
+    POS_SCALE = {"counts": 1, "rad": _RAD_PER_COUNT, "mm": _MM_PER_COUNT}
+    VEL_SCALE = {"counts/s": 1, "rad/s": _RAD_PER_COUNT, "mm/s": _MM_PER_COUNT}
     # --------------------------------------------------------------------------
 
     def __init__(self,
@@ -28,11 +47,14 @@ class Encoder:
         '''Initializes an Encoder object'''
         self.chA_pin = Pin(chA_pin)
         self.chB_pin = Pin(chB_pin)
-        self.AR = 65535 # Auto-reload value for 16-bit timer
+        self.AR = _AR # Auto-reload value for 16-bit timer
         self.tim_obj = Timer(tim_num, prescaler=0, period=self.AR)
         # Note that for this timer, we are not setting a frequency. Instead, the encoders ouput pulses that will drive the timer. We just set the period to tell the timer (which will be a counter) when to roll over.
         self.tim_obj.channel(1, mode=Timer.ENC_AB, pin=self.chA_pin)
         self.tim_obj.channel(2, mode=Timer.ENC_AB, pin=self.chB_pin)
+        # Address of this timer's count register, so update() can read it
+        # directly instead of going through Timer.counter()
+        self._cnt_addr = getattr(stm, "TIM" + str(tim_num)) + stm.TIM_CNT
 
         # Internal states
         self.position_counts   = 0     # Total accumulated position counts
@@ -43,22 +65,20 @@ class Encoder:
         self.velocity_counts_per_s = 0  # Velocity in counts per second
         
     # --------------------------------------------------------------------------
-    def update(self):
-        '''Update encoder count and compute velocity.'''
+    @micropython.native
+    def update_and_read(self):
+        '''Update encoder count and compute velocity, returning
+        (position counts, velocity counts/s) from this one register read.'''
 
         # Read current count and compute delta
-        curr_count = self.tim_obj.counter() # read current count from timer
-        delta = curr_count - self.prev_count # delta is change in counts
-
-        # Check if delta is out of range (handle 16-bit over/underflow)
-        half_range = (self.AR + 1) // 2  # 32768 for 16-bit timer
-        if delta < -half_range:
-            delta += self.AR + 1
-        elif delta > half_range:
-            delta -= self.AR + 1
-        
+        curr_count = stm.mem32[self._cnt_addr] & _COUNT_MASK # read current count from timer register
+        # Change in counts, wrapped to a signed 16-bit value so timer
+        # over/underflow is handled without branching
+        delta = ((curr_count - self.prev_count + _HALF_RANGE) & _COUNT_MASK) - _HALF_RANGE
+
         # Update count-based position
-        self.position_counts += delta # update position
+        position = self.position_counts + delta
+        self.position_counts = position # update position
         
         # Compute time since last update
         curr_time = ticks_us()
@@ -67,17 +87,25 @@ class Encoder:
         # Update dt
         self.dt = dt
 
-        # Compute raw velocity (counts/s)
-        if self.dt != 0:
-            self.velocity_counts_per_s = delta*1e6 / self.dt
+        # Compute raw velocity (integer counts/s; integer math avoids a float
+        # division and float allocation every update)
+        if dt > 0:
+            velocity = (delta * 1000000) // dt
         else: # this shouldn't happen, but just in case, avoid division by zero
-            self.velocity_counts_per_s = 0
+            velocity = 0
+        self.velocity_counts_per_s = velocity
 
         # Save for next update
         self.delta = delta
         self.prev_count = curr_count
         self.prev_time = curr_time
 
+        return position, velocity
+
+    # update() is the same method; callers that use the getters below can
+    # just ignore the returned pair
+    update = update_and_read
+
     # --------------------------------------------------------------------------
     def zero(self):
         '''Zero the encoder position.'''
@@ -85,26 +113,28 @@ class Encoder:
         self.prev_count = self.tim_obj.counter()
         self.prev_time = ticks_us()
 
+    # --------------------------------------------------------------------------
+    def get_position_counts(self):
+        '''Return position in counts (no unit dispatch; use this in control loops).'''
+        return self.position_counts
+
+    # --------------------------------------------------------------------------
+    def get_velocity_counts(self):
+        '''Return velocity in counts/s (no unit dispatch; use this in control loops).'''
+        return self.velocity_counts_per_s
+
     # --------------------------------------------------------------------------
     def get_position(self, unit: str = "counts"):
         '''Return position in specified units: "counts", "rad", or "mm".'''
-        if unit == "counts":
-            return self.position_counts  # position [counts]
-        elif unit == "rad":
-            return self.position_counts * self.RAD_PER_COUNT  # position [rad]
-        elif unit == "mm":
-            return self.position_counts * self.RAD_PER_COUNT * self.WHEEL_RADIUS_MM  # position [mm]
-        else:
+        try:
+            return self.position_counts * self.POS_SCALE[unit]
+        except KeyError:
             raise ValueError("Invalid unit. Choose 'counts', 'rad', or 'mm'.")
         
     # --------------------------------------------------------------------------
     def get_velocity(self, unit: str = "counts/s"):
         '''Return velocity in specified units: "counts/s", "rad/s", or "mm/s".'''
-        if unit == "counts/s":
-            return self.velocity_counts_per_s  # velocity [counts/s]
-        elif unit == "rad/s":
-            return self.velocity_counts_per_s * self.RAD_PER_COUNT  # velocity [rad/s]
-        elif unit == "mm/s":
-            return self.velocity_counts_per_s * self.RAD_PER_COUNT * self.WHEEL_RADIUS_MM  # velocity [mm/s]
-        else:
+        try:
+            return self.velocity_counts_per_s * self.VEL_SCALE[unit]
+        except KeyError:
             raise ValueError("Invalid unit. Choose 'counts/s', 'rad/s', or 'mm/s'.")
\ No newline at end of file
@@ -8,14 +8,44 @@ This module defines the GCTask class, which periodically invokes the garbage col
 import gc
 
 class GCTask:
-    """Task to periodically run garbage collection."""
+    """Task to periodically run garbage collection.
 
-    def __init__(self):
-        pass
+    A full collection walks the whole heap, so it is only run when free memory
+    drops below a low-water mark. gc.threshold() is also set so the runtime
+    collects on its own before the heap is exhausted. The mem_free() check
+    itself is rate-limited by the task's scheduler period (100 ms in main.py),
+    so no extra tick gating is done here.
+
+    If a guard task is given (main.py uses the motor task), a collection is
+    put off to a later check while that task is due within min_slack_us, so
+    it doesn't push the guard task past its deadline. Once free memory falls
+    below half the low-water mark, it collects regardless.
+
+    Attributes:
+        low_water: Free-memory level (bytes) below which a collection is run.
+        guard_task: Optional cotask.Task whose next run a collection must not delay.
+        min_slack_us: Time (us) that must remain before guard_task's next run to collect.
+    """
+
+    def __init__(self, low_water=8192, guard_task=None, min_slack_us=10000):
+        self.low_water = low_water
+        self.guard_task = guard_task
+        self.min_slack_us = min_slack_us
+        # Let the runtime trigger a collection after this many bytes are allocated
+        gc.threshold(gc.mem_free() // 4 + gc.mem_alloc())
+
+    def _have_slack(self, free):
+        """Check that a collection now won't make the guard task late."""
+        if self.guard_task is None or free < self.low_water // 2:
+            return True
+        slack = self.guard_task.time_to_next_run()
+        return slack is None or slack >= self.min_slack_us
 
     def run(self):
         while True:
             # print("Running garbage collection...")
             # print("Free memory before GC:", gc.mem_free())
-            gc.collect()  # Run garbage collection
-            yield # Yield control back to the scheduler
\ No newline at end of file
+            free = gc.mem_free()
+            if free < self.low_water and self._have_slack(free):
+                gc.collect()  # Run garbage collection
+            yield # Yield control back to the scheduler
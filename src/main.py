@@ -26,6 +26,7 @@ A list of inactive tasks is also provided:
 """
 
 import gc
+import micropython
 import cotask
 import task_share
 from pyb import Pin, UART, I2C
@@ -45,14 +46,29 @@ from path_planning_task import PathPlanningTask
 # from state_estimation_task import StateEstimationTask
 from read_IMU_task import ReadIMUTask
 # from bump_task import BumpTask
-from os import listdir
+from os import stat
+
+# Set to True to have the scheduler time every task run (shown in the task
+# table printed on exit); this costs two ticks_us() calls per run, so leave
+# it off for normal runs
+PROFILE = False
+
+# ==============================================================================
+# SCHEDULER LOOP:
+# ==============================================================================
+# The outermost loop, compiled to machine code so that calling the scheduler
+# over and over costs no bytecode dispatch of its own
+@micropython.native
+def run_scheduler(pri_sched):
+    while True: # run infinite iterations of the scheduler
+        pri_sched()
 
 # ==============================================================================
 # MAIN FUNCTION:
 # ==============================================================================
 def main():
     print("\r\n=== ME405 Scheduler Start ===\r\n")
-    # MAX_SAMPLES = 5
+    # MAX_SAMPLES = 8  # must be a power of two (DataCollectionTask ring buffers)
     # OBSV_SAMPLES = MAX_SAMPLES // 2  # Observer collects half the samples
     
     # ==========================================================================
@@ -109,58 +125,64 @@ def main():
     # ==========================================================================
     # CHECK FOR CALIBRATION FILES:
     # ==========================================================================
-    filelist = listdir()
+    # (stat() each name directly rather than listing the whole directory)
     # Check for existing IMU calibration file
-    if "imu_cal.bin" in filelist:
+    try:
+        stat("imu_cal.bin")
+    except OSError:
+        print("No IMU calibration file found.")
+    else:
         print("IMU calibration file 'imu_cal.bin' found.")
         imu.write_calibration_coeffs()
-    else:
-        print("No IMU calibration file found.")
 
     # Check for existing IR calibration file
-    if "IR_cal.txt" in filelist:
+    try:
+        stat("IR_cal.txt")
+    except OSError:
+        print("No IR calibration file found.")
+    else:
         print("IR calibration file 'IR_cal.txt' found.")
         ir_array.set_calibration()
-    else:
-        print("No IR calibration file found.")
 
     # ==========================================================================
     # SETUP SHARES AND QUEUES:
     # ==========================================================================
     # ------------------------------- SHARES -----------------------------------
+    Share = task_share.Share # local alias: one lookup instead of two per share
+    # All of the float shares below keep their data in one contiguous bank
+    # (one slot each) instead of a separate small buffer per share; they are
+    # used exactly like ordinary Shares. Increase the size if adding more.
+    float_bank = task_share.ShareBank('f', 22, name='Float Share Bank')
     # --------------------------------------------------------------------------
     # Streaming shares...
-    time_sh = task_share.Share('H', name='Time share')
-    left_pos_sh = task_share.Share('h', name= 'Left motor position share')
-    right_pos_sh = task_share.Share('h', name= 'Right motor position share')
-    left_vel_sh = task_share.Share('h', name= 'Left motor velocity share')
-    right_vel_sh = task_share.Share('h', name= 'Right motor velocity share')
+    # One snapshot of the latest motor sample, written and read as a unit:
+    # (time [ms], left_pos, right_pos [counts], left_vel, right_vel [counts/s])
+    motor_sample = task_share.ShareBank('l', 5, name='Motor Sample Bank')
     # --------------------------------------------------------------------------
     # Motor control shares...
-    start_time_sh = task_share.Share('L', name='Start Time Share')
-    eff = task_share.Share('f', name='Requested Effort') # float effort percent
-    setpoint = task_share.Share('f', name='Velocity Setpoint') # 'h' for signed 16-bit to handle larger velocity values
-    kp = task_share.Share('f', name='Prop. Gain') # 'f' for float to store Kp
-    ki = task_share.Share('f', name='Integral Gain') # 'f' for float to store Ki
-    left_eff_sh = task_share.Share('f', name='Left Motor Effort Share')
-    right_eff_sh = task_share.Share('f', name='Right Motor Effort Share')
+    eff = float_bank.share(name='Requested Effort') # float effort percent
+    setpoint = float_bank.share(name='Velocity Setpoint') # 'h' for signed 16-bit to handle larger velocity values
+    kp = float_bank.share(name='Prop. Gain') # 'f' for float to store Kp
+    ki = float_bank.share(name='Integral Gain') # 'f' for float to store Ki
+    left_eff_sh = float_bank.share(name='Left Motor Effort Share')
+    right_eff_sh = float_bank.share(name='Right Motor Effort Share')
     # --------------------------------------------------------------------------
     # Driving mode and control mode shares...
-    driving_mode = task_share.Share('B', name='Driving Mode')
+    driving_mode = Share('B', name='Driving Mode')
     # driving mode --- 0: straight line, 1: pivot, 2: arc
-    control_mode = task_share.Share('B', name='Control Mode')
+    control_mode = Share('B', name='Control Mode')
     # control mode --- 0: effort, 1: velocity, 2: line follow
     # --------------------------------------------------------------------------
     # Line following shares...
-    left_sp_sh = task_share.Share('f', name='LF Left Setpoint')
-    right_sp_sh = task_share.Share('f', name='LF Right Setpoint')
-    k_line = task_share.Share('f', name='LineFollow K_line')
-    lf_target = task_share.Share('f', name='LineFollow Target')
-    bias = task_share.Share('f', name='LineFollow Centroid Bias')
-    heading = task_share.Share('f', name='Heading Share')
-    heading_offset = task_share.Share('f', name='Heading Offset Share')
-    k_heading = task_share.Share('f', name='Heading Control Gain')
-    heading_setpoint = task_share.Share('f', name='Heading Setpoint Share')
+    left_sp_sh = float_bank.share(name='LF Left Setpoint')
+    right_sp_sh = float_bank.share(name='LF Right Setpoint')
+    k_line = float_bank.share(name='LineFollow K_line')
+    lf_target = float_bank.share(name='LineFollow Target')
+    bias = float_bank.share(name='LineFollow Centroid Bias')
+    heading = float_bank.share(name='Heading Share')
+    heading_offset = float_bank.share(name='Heading Offset Share')
+    k_heading = float_bank.share(name='Heading Control Gain')
+    heading_setpoint = float_bank.share(name='Heading Setpoint Share')
 
     # Initialize line following shares...
     left_sp_sh.put(0.0)
@@ -170,42 +192,44 @@ def main():
     bias.put(0.0)
     # --------------------------------------------------------------------------
     # Spectator shares...
-    total_s_sh = task_share.Share('f', name='Total Displacement Share')
-    abs_x_sh = task_share.Share('f', name='Absolute X Position Share')
-    abs_y_sh = task_share.Share('f', name='Absolute Y Position Share')
-    abs_theta_sh = task_share.Share('f', name='Absolute Theta Share')
+    total_s_sh = float_bank.share(name='Total Displacement Share')
+    abs_x_sh = float_bank.share(name='Absolute X Position Share')
+    abs_y_sh = float_bank.share(name='Absolute Y Position Share')
+    abs_theta_sh = float_bank.share(name='Absolute Theta Share')
     # --------------------------------------------------------------------------
     # Navigation shares...
-    nav_target_x_sh = task_share.Share('f', name='Navigation Target X Share')
-    nav_target_y_sh = task_share.Share('f', name='Navigation Target Y Share')
-    nav_speed_sh = task_share.Share('f', name='Navigation Speed Share')
+    nav_target_x_sh = float_bank.share(name='Navigation Target X Share')
+    nav_target_y_sh = float_bank.share(name='Navigation Target Y Share')
+    nav_speed_sh = float_bank.share(name='Navigation Speed Share')
     # --------------------------------------------------------------------------
     # State Estimation shares...
-    # psi_sh = task_share.Share('f', name='Yaw Angle Share')
-    # psi_dot_sh = task_share.Share('f', name='Yaw Rate Share')
-    # obsv_time_sh = task_share.Share('H', name='Observed Time Share')
-    # obsv_sL_sh = task_share.Share('h', name='Observed Left Displacement Share')
-    # obsv_sR_sh = task_share.Share('h', name='Observed Right Displacement Share')
-    # obsv_psi_sh = task_share.Share('h', name='Observed Yaw Angle Share')
-    # obsv_psi_dot_sh = task_share.Share('h', name='Observed Yaw Rate Share')
-    # obsv_left_vel_sh = task_share.Share('h', name='Observed Left Velocity Share')
-    # obsv_right_vel_sh = task_share.Share('h', name='Observed Right Velocity Share')
-    # obsv_s_sh = task_share.Share('h', name='Observed Linear Displacement Share')
-    # obsv_yaw_sh = task_share.Share('h', name='Observed Yaw Share')
+    # psi_sh = Share('f', name='Yaw Angle Share')
+    # psi_dot_sh = Share('f', name='Yaw Rate Share')
+    # One snapshot of the latest observer output, written and read as a unit:
+    # (time [ms], left_vel, right_vel [rad/s / 1e3], s [m / 1e3], yaw [rad / 1e3])
+    # obsv_sample = task_share.ShareBank('l', 5, name='Observer Sample Bank')
     # --------------------------------------------------------------------------
     # Boolean flags (shares)...
-    mtr_enable = task_share.Share('B', name='Motor Enable Flag')
-    stream_data = task_share.Share('B', name='Stream Data Flag')
-    abort = task_share.Share('B', name='Abort Flag')
-    run_observer = task_share.Share('B', name='Run Observer Flag')
-    read_IMU_flg = task_share.Share('B', name='Read IMU flag')
-    motor_data_ready = task_share.Share('B', name='Motor Data Ready Flag')
-    obsv_data_ready = task_share.Share('B', name='Observer Data Ready Flag')
-    planning = task_share.Share('B', name='Path Planning Mode Flag')
-    game_origin_mode = task_share.Share('B', name='Game Origin Mode Flag')
+    # Every flag below is one bit of a single shared word; each works just
+    # like a 'B' Share, and a task can also read them all at once
+    flags = task_share.ShareFlags(name='Flags')
+    mtr_enable = flags.flag(name='Motor Enable Flag')
+    stream_data = flags.flag(name='Stream Data Flag')
+    abort = flags.flag(name='Abort Flag')
+    run_observer = flags.flag(name='Run Observer Flag')
+    read_IMU_flg = flags.flag(name='Read IMU flag')
+    motor_data_ready = flags.flag(name='Motor Data Ready Flag')
+    # obsv_data_ready = flags.flag(name='Observer Data Ready Flag') # only for StateEstimationTask
+    planning = flags.flag(name='Path Planning Mode Flag')
+    game_origin_mode = flags.flag(name='Game Origin Mode Flag')
     #
     # ------------------------------- QUEUES -----------------------------------
     # (none for now)
+    #
+    # Motor sample rows (time, left_pos, right_pos, left_vel, right_vel) for DataCollectionTask
+    # sample_ring = task_share.ShareRing('l', 5, 8, name='Motor Sample Ring')
+    # Observer sample rows (time, left_vel, right_vel, s, yaw) for DataCollectionTask
+    # obsv_ring = task_share.ShareRing('l', 5, 8, name='Observer Sample Ring')
 
     # ==========================================================================
     # CREATE TASK OBJECTS (since tasks are written as classes):
@@ -218,12 +242,12 @@ def main():
     motor_task_obj = MotorControlTask(left_motor, right_motor,
                                       left_encoder, right_encoder,
                                       battery,
-                                      eff, mtr_enable, motor_data_ready, run_observer, abort, driving_mode, setpoint, kp, ki, control_mode, start_time_sh,
-                                      time_sh, left_pos_sh, right_pos_sh, left_vel_sh, right_vel_sh,
+                                      eff, mtr_enable, motor_data_ready, run_observer, abort, driving_mode, setpoint, kp, ki, control_mode,
+                                      motor_sample,
                                       left_sp_sh, right_sp_sh, left_eff_sh, right_eff_sh)
 
     stream_task_obj = StreamTask(stream_data, uart,
-                                 time_sh, left_pos_sh, right_pos_sh, left_vel_sh, right_vel_sh,
+                                 motor_sample,
                                  motor_data_ready, abort)
 
     steering_task_obj = SteeringTask(ir_array, battery,
@@ -238,60 +262,65 @@ def main():
 
     spectator_task_obj = SpectatorTask(run_observer,
                                        game_origin_mode,
-                                       left_pos_sh, right_pos_sh, total_s_sh,
+                                       motor_sample, total_s_sh,
                                        abs_x_sh, abs_y_sh, abs_theta_sh)
     
     path_planning_task_obj = PathPlanningTask(planning, bias, total_s_sh, abs_x_sh, abs_y_sh, abs_theta_sh, kp, ki, k_line, lf_target, control_mode, driving_mode, abort, mtr_enable, setpoint, stream_data, heading, heading_setpoint, k_heading, eff)
 
     # data_task_obj = DataCollectionTask(col_start, col_done,
     #                                    mtr_enable, abort, motor_data_ready, obsv_data_ready,
-    #                                    time_q, left_pos_q, right_pos_q, left_vel_q, right_vel_q,
-    #                                    obsv_time_q, obsv_sL_q, obsv_sR_q, obsv_psi_q, obsv_psi_dot_q,
-    #                                    time_sh, left_pos_sh, right_pos_sh, left_vel_sh, right_vel_sh, obsv_time_sh, obsv_sL_sh, obsv_sR_sh, obsv_psi_sh, obsv_psi_dot_sh,
-    #                                    obsv_left_vel_sh, obsv_right_vel_sh, obsv_s_sh, obsv_yaw_sh,
-    #                                    obsv_left_vel_q, obsv_right_vel_q, obsv_s_q, obsv_yaw_q)
-
-    # state_estimation_task_obj = StateEstimationTask(start_time_sh,
-    #                                                 run_observer,
+    #                                    sample_ring, obsv_ring,
+    #                                    MAX_SAMPLES, OBSV_SAMPLES)
+
+    # state_estimation_task_obj = StateEstimationTask(run_observer,
     #                                                 obsv_data_ready,
-    #                                                 obsv_time_sh, 
-    #                                                 left_pos_sh, right_pos_sh,
-    #                                                 left_vel_sh, right_vel_sh,
+    #                                                 motor_sample,
     #                                                 psi_sh, psi_dot_sh,
     #                                                 left_eff_sh, right_eff_sh,
     #                                                 battery,
-    #                                                 obsv_sL_sh, obsv_sR_sh, obsv_psi_sh, obsv_psi_dot_sh, obsv_left_vel_sh, obsv_right_vel_sh, obsv_s_sh, obsv_yaw_sh)
+    #                                                 obsv_sample, obsv_ring)
 
     read_IMU_task_obj = ReadIMUTask(imu, heading, heading_offset, read_IMU_flg, mtr_enable)
     
+    # Bump handling is currently DISABLED: BumpTask is in 'inactive tasks' and
+    # is neither imported nor constructed, so no bump ExtInt is registered.
+    # To enable it, copy bump_task.py to the board, uncomment its import and
+    # the line below. It is interrupt driven (ExtInt + one-shot timer), so
+    # constructing it is enough; don't add it to the scheduler
     # bump_task_obj = BumpTask(abort, bump_pin='H0')
 
     # ==========================================================================
     # CREATE cotask.Task WRAPPERS:
     # ==========================================================================
 	# (If trace is enabled for any task, memory will be allocated for state transition tracing, and the application will run out of memory after a while and quit. Therefore, use tracing only for debugging and set trace to False when it's not needed)
+    Task = cotask.Task # local alias, as for Share above
 
-    _motor_task = cotask.Task(motor_task_obj.run, name='Motor Control Task', priority=3, period=20, profile=True, trace=False)
+    _motor_task = Task(motor_task_obj.run, name='Motor Control Task', priority=3, period=20, profile=PROFILE, trace=False)
 
-    _ui_task = cotask.Task(ui_task_obj.run, name='User Interface Task', priority=0, period=100, profile=True, trace=False)
+    _ui_task = Task(ui_task_obj.run, name='User Interface Task', priority=0, period=100, profile=PROFILE, trace=False)
+    ui_task_obj.task = _ui_task # lets the UI slow its polling while idle
 
-    _stream_task = cotask.Task(stream_task_obj.run, name='Stream Task', priority=1, period=20, profile=True, trace=False)
+    # The motor task calls the stream task's go() as soon as it publishes a
+    # sample (or handles an abort), so samples go out without waiting for a
+    # period; the slow period only covers changes made while the motors are
+    # idle, such as the UI turning streaming on or off
+    _stream_task = Task(stream_task_obj.run, name='Stream Task', priority=1, period=100, profile=PROFILE, trace=False)
+    motor_task_obj.notify = _stream_task.go
 
-    _steering_task = cotask.Task(steering_task_obj.run, name='Steering Task', priority=2, period=40, profile=True, trace=False)
+    _steering_task = Task(steering_task_obj.run, name='Steering Task', priority=2, period=40, profile=PROFILE, trace=False)
 
-    _gc_task = cotask.Task(gc_task_obj.run, name='Garbage Collector Task', priority=0, period=100, profile=True, trace=False)
+    _gc_task = Task(gc_task_obj.run, name='Garbage Collector Task', priority=0, period=100, profile=PROFILE, trace=False)
+    gc_task_obj.guard_task = _motor_task # only collect when the motor task isn't about to run
 
-    _spectator_task = cotask.Task(spectator_task_obj.run, name='Spectator Task', priority=2, period=20, profile=True, trace=False)
+    _spectator_task = Task(spectator_task_obj.run, name='Spectator Task', priority=2, period=20, profile=PROFILE, trace=False)
 
-    _path_planning_task = cotask.Task(path_planning_task_obj.run, name='Path Planning Task', priority=2, period=40, profile=True, trace=False)
+    _path_planning_task = Task(path_planning_task_obj.run, name='Path Planning Task', priority=2, period=40, profile=PROFILE, trace=False)
 
-    # _data_collection_task = cotask.Task(data_task_obj.run, name='Data Collection Task', priority=2, period=20, profile=True, trace=False)
+    # _data_collection_task = Task(data_task_obj.run, name='Data Collection Task', priority=2, period=20, profile=PROFILE, trace=False)
 
-    # _state_estimation_task = cotask.Task(state_estimation_task_obj.run, name='State Estimation Task', priority=2, period=20, profile=True, trace=False)
+    # _state_estimation_task = Task(state_estimation_task_obj.run, name='State Estimation Task', priority=2, period=20, profile=PROFILE, trace=False)
 
-    _read_IMU_task = cotask.Task(read_IMU_task_obj.run, name='Read IMU Task', priority=1, period=40, profile=True, trace=False)
-
-    # _bump_task = cotask.Task(bump_task_obj.run, name='Bump Task', priority=4, period=20, profile=True, trace=False)
+    _read_IMU_task = Task(read_IMU_task_obj.run, name='Read IMU Task', priority=1, period=40, profile=PROFILE, trace=False)
 
     # ==========================================================================
     # ADD TASKS TO SCHEDULER LIST:
@@ -307,7 +336,9 @@ def main():
     # cotask.task_list.append(_data_collection_task)
     # cotask.task_list.append(_state_estimation_task)
     cotask.task_list.append(_read_IMU_task)
-    # cotask.task_list.append(_bump_task)
+
+    # The task set is complete; fix its shape for the scheduler
+    cotask.task_list.freeze()
 
     # ==========================================================================
     # RUN THE SCHEDULER:
@@ -319,19 +350,19 @@ def main():
     # --------------------------------------------------------------------------
 	# Run the scheduler with the chosen scheduling algorithm. Quit if ^C pressed
     print("\r\nScheduler running... Press Ctrl-C to halt.\r\n")
-    while True: # attempt to run infinite iterations of the scheduler
-        try:
-            cotask.task_list.pri_sched()
-        except KeyboardInterrupt: # if ^C pressed, stop motors and exit
-            left_motor.disable()
-            right_motor.disable()
-            print("Keyboard interrupt detected, stopping motors and halting scheduler.")
-            break
-        except: # if another error occurs, stop motors and raise error
-            left_motor.disable()
-            right_motor.disable()
-            print("Unexpected error in scheduler, stopping motors.")
-            raise
+    # The try block is entered once, around the whole loop, rather than once per
+    # scheduler pass; pri_sched() runs at most one task per call
+    try:
+        run_scheduler(cotask.task_list.pri_sched)
+    except KeyboardInterrupt: # if ^C pressed, stop motors and exit
+        left_motor.disable()
+        right_motor.disable()
+        print("Keyboard interrupt detected, stopping motors and halting scheduler.")
+    except: # if another error occurs, stop motors and raise error
+        left_motor.disable()
+        right_motor.disable()
+        print("Unexpected error in scheduler, stopping motors.")
+        raise
 
     # Diagnostics on exit: print a table of task data and a table of shared information data
     print("\n=== Scheduler Halted ===")
@@ -6,7 +6,8 @@ This module defines the MotorControlTask class, which implements a finite state
 
 """
 
-from pyb import millis
+import micropython
+from time import ticks_ms, ticks_diff
 from closed_loop import ClosedLoop
 
 class MotorControlTask:
@@ -28,16 +29,15 @@ class MotorControlTask:
         kp: Share for proportional gain of the controller
         ki: Share for integral gain of the controller
         control_mode: Share for control mode (0=effort, 1=velocity, 2=line follow)
-        start_time: Share for logging start time when motors are enabled
-        time_sh: Share for logging timestamps of motor data
-        left_pos_sh: Share for logging left encoder position
-        right_pos_sh: Share for logging right encoder position
-        left_vel_sh: Share for logging left encoder velocity
-        right_vel_sh: Share for logging right encoder velocity
+        motor_sample: ShareBank('l', 5) holding the latest (time, left_pos, right_pos, left_vel, right_vel) sample
         left_sp_sh: Share for desired left motor setpoint (for closed-loop control)
         right_sp_sh: Share for desired right motor setpoint (for closed-loop control)
         left_eff_sh: Share for logging left motor effort command
         right_eff_sh: Share for logging right motor effort command
+        sample_ring: Optional ShareRing('l', 5, N) receiving a (time, left_pos, right_pos, left_vel, right_vel) row each tick (for DataCollectionTask)
+
+    The notify attribute is not a constructor argument. It starts as None, and main.py may set it to a
+    callable (e.g. the stream task's go()) which is called after each new sample and when an abort is handled.
     """
 
     # The states of the FSM
@@ -53,9 +53,9 @@ class MotorControlTask:
                  left_encoder, right_encoder,
                  battery,
                  eff, mtr_enable, motor_data_ready, run_observer, abort, driving_mode, setpoint, kp, ki, control_mode,
-                 start_time,
-                 time_sh, left_pos_sh, right_pos_sh, left_vel_sh, right_vel_sh,
-                 left_sp_sh, right_sp_sh, left_eff_sh, right_eff_sh):
+                 motor_sample,
+                 left_sp_sh, right_sp_sh, left_eff_sh, right_eff_sh,
+                 sample_ring=None):
 
         # Hardware
         self.left_motor = left_motor
@@ -75,14 +75,10 @@ class MotorControlTask:
         self.right_sp_sh = right_sp_sh
         self.left_eff_sh = left_eff_sh
         self.right_eff_sh = right_eff_sh
-        self.start_time = start_time
 
         # Queues
-        self.time_sh = time_sh
-        self.left_pos_sh = left_pos_sh
-        self.right_pos_sh = right_pos_sh
-        self.left_vel_sh = left_vel_sh
-        self.right_vel_sh = right_vel_sh
+        self.motor_sample = motor_sample
+        self.sample_ring = sample_ring
 
         # Flags
         self.mtr_enable = mtr_enable
@@ -94,6 +90,8 @@ class MotorControlTask:
         self.left_controller = ClosedLoop(self.kp, self.ki, self.left_sp_sh, self.battery, effort_limits=(-100, 100))
         self.right_controller = ClosedLoop(self.kp, self.ki, self.right_sp_sh, self.battery, effort_limits=(-100, 100))
 
+        self.notify = None # set by main.py to wake a consumer task on each new sample
+
         self.t0 = 0 # zero the start time offset
         self.state = self.S0_INIT # ensure FSM starts in state S0_INIT
     
@@ -118,7 +116,23 @@ class MotorControlTask:
     # --------------------------------------------------------------------------
     ### FINITE STATE MACHINE
     # --------------------------------------------------------------------------
+    @micropython.native
     def run(self):
+        # Bound methods used every S2 tick, looked up once here; the generator
+        # keeps them as fast locals between runs
+        abort_get = self.abort.get
+        control_mode_get = self.control_mode.get
+        left_read = self.left_encoder.update_and_read
+        right_read = self.right_encoder.update_and_read
+        left_ctrl_run = self.left_controller.run
+        right_ctrl_run = self.right_controller.run
+        left_set_effort = self.left_motor.set_effort
+        right_set_effort = self.right_motor.set_effort
+        sample_write = self.motor_sample.write
+        left_eff_put = self.left_eff_sh.put
+        right_eff_put = self.right_eff_sh.put
+        data_ready_put = self.motor_data_ready.put
+
         while True: # run infinite iterations of the FSM
             ### 0: INIT STATE --------------------------------------------------
             if (self.state == self.S0_INIT):
@@ -142,6 +156,7 @@ class MotorControlTask:
                 self.right_controller.reset()
 
                 self.state = self.S1_WAIT_FOR_ENABLE # set next state
+                continue # check for enable in this same run instead of next period
 
             ### 1: WAITING STATE -----------------------------------------------
             elif (self.state == self.S1_WAIT_FOR_ENABLE):
@@ -160,8 +175,7 @@ class MotorControlTask:
                     self.right_encoder.zero()
 
                     # Log a timestamp to zero the time right when the motors are enabled
-                    self.t0 = millis()
-                    self.start_time.put(self.t0)
+                    self.t0 = ticks_ms()
 
                     # Enable motors
                     self.left_motor.enable()
@@ -175,7 +189,7 @@ class MotorControlTask:
             ### 2: RUN STATE ---------------------------------------------------
             elif (self.state == self.S2_RUN):
                 # Check for abort signal
-                if self.abort.get(): # (abort is a share)
+                if abort_get(): # (abort is a share)
                     self.left_motor.disable()
                     self.right_motor.disable()
                     self.left_controller.reset()
@@ -183,60 +197,68 @@ class MotorControlTask:
                     self.run_observer.put(0)  # Disable state estimator on transition from RUN to WAIT
                     # self.abort.put(0)  # Reset abort flag after handling it; actually, leave it to UI to reset before starting a new run
                     self.mtr_enable.put(0)  # Clear enable flag
+                    if self.notify is not None:
+                        self.notify() # let the consumer see the abort
                     self.state = self.S1_WAIT_FOR_ENABLE
                     continue
 
-                # Update encoders
-                self.left_encoder.update()
-                self.right_encoder.update()
+                # Update encoders, getting current positions and velocities (in raw
+                # units, counts and counts/s, for data streaming) from the same update
+                left_pos, left_vel_fb = left_read()
+                right_pos, right_vel_fb = right_read()
 
                 # --- Get raw data for storing to the shares ---
-                # Calculate the exact timestamp of the measurements
-                t = millis() - self.t0
-                # Get current positions and velocities (in raw units, counts and counts/s, for data streaming)
-                left_pos = self.left_encoder.get_position("counts")
-                right_pos = self.right_encoder.get_position("counts")
-                left_vel_fb = self.left_encoder.get_velocity("counts/s")
-                right_vel_fb = self.right_encoder.get_velocity("counts/s")
+                # Calculate the exact timestamp of the measurements (ms since enable;
+                # ticks_diff() stays correct when the tick counter wraps)
+                t = ticks_diff(ticks_ms(), self.t0)
 
                 # --------------------------------------------------------------
                 ### Determine left and right efforts based on control mode
                 # 0 = Effort; 1 = Velocity; 2 = Line Follow
 
+                # Read the control mode once for this tick
+                control_mode = control_mode_get()
+
                 # ----------------------------------------------------------
                 # MODE 0: EFFORT (open loop control)
-                if self.control_mode.get() == 0:
+                if control_mode == 0:
                     left_eff, right_eff = self._split_setpoints(self.driving_mode.get(), self.eff.get())
 
                 # ----------------------------------------------------------
                 # MODE 1: VELOCITY (closed-loop velocity control) or MODE 2: LINE FOLLOWING (outer + inner loop)
                 else:
                     # IF MODE 1: VELOCITY apply user setpoint
-                    if self.control_mode.get() == 1:
-                        self.left_sp_sh.put(float(self.setpoint.get()))
-                        self.right_sp_sh.put(float(self.setpoint.get()))
+                    if control_mode == 1:
+                        sp = float(self.setpoint.get())
+                        self.left_sp_sh.put(sp)
+                        self.right_sp_sh.put(sp)
                     # Calculate control efforts
-                    left_eff = self.left_controller.run(left_vel_fb)
-                    right_eff = self.right_controller.run(right_vel_fb)
+                    left_eff = left_ctrl_run(left_vel_fb)
+                    right_eff = right_ctrl_run(right_vel_fb)
 
                 # --------------------------------------------------------------
                 # Apply efforts
-                self.left_motor.set_effort(float(left_eff))
-                self.right_motor.set_effort(float(right_eff))
+                left_set_effort(left_eff)
+                right_set_effort(right_eff)
                 # --------------------------------------------------------------
 
-                # Write data samples to shares (for other tasks using them)
-                self.time_sh.put(int(t))
-                self.left_pos_sh.put(int(left_pos))
-                self.right_pos_sh.put(int(right_pos))
-                self.left_vel_sh.put(int(left_vel_fb))
-                self.right_vel_sh.put(int(right_vel_fb))
+                # Write the data sample to the share bank (for other tasks using it)
+                # in one critical section, so readers never see a mix of two ticks
+                # (all five are already ints; the encoder computes velocity with integer math)
+                sample = (t, left_pos, right_pos, left_vel_fb, right_vel_fb)
+                sample_write(sample)
+
+                # Publish the same sample as one ring row for data collection
+                if self.sample_ring is not None:
+                    self.sample_ring.write(sample)
                 
                 # Store efforts in shares for monitoring
-                self.left_eff_sh.put(float(left_eff))
-                self.right_eff_sh.put(float(right_eff))
+                left_eff_put(left_eff)
+                right_eff_put(right_eff)
 
-                # Set flag for data task
-                self.motor_data_ready.put(1)
+                # Set flag for data task, and wake it if it runs on events
+                data_ready_put(1)
+                if self.notify is not None:
+                    self.notify()
             
             yield self.state
\ No newline at end of file
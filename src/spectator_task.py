@@ -5,6 +5,11 @@
 This module defines the SpectatorTask class, which implements a finite state machine (FSM) to estimate the robot's absolute position in a world or game coordinate frame using wheel encoder data. The task integrates wheel displacements to compute the robot's pose (x, y, theta) and updates shared variables for use by other tasks."""
 
 import math
+import micropython
+from micropython import const
+from array import array
+
+_DEBUG = const(0) # 1 to print the pose every tick
 
 class SpectatorTask:
     """Estimates the absolute position of the robot using encoder data.
@@ -12,8 +17,7 @@ class SpectatorTask:
     Attributes:
         run_observer: Share to start/stop the observer.
         game_origin_mode: Share to select world frame or game origin mode.
-        left_pos_sh: Share for left wheel encoder position.
-        right_pos_sh: Share for right wheel encoder position.
+        motor_sample: ShareBank holding the latest (time, left_pos, right_pos, left_vel, right_vel) motor sample.
         total_s_sh: Share for total distance traveled along center line.
         abs_x_sh: Share for absolute x position.
         abs_y_sh: Share for absolute y position.
@@ -28,6 +32,12 @@ class SpectatorTask:
     RAD_PER_COUNT = 2 * math.pi / CPR_WHEEL  # Radians per count
     WHEEL_RADIUS_MM = 35  # Wheel radius in mm
     WHEEL_BASE_MM = 141  # Distance between wheels in mm
+    MM_PER_COUNT = RAD_PER_COUNT * WHEEL_RADIUS_MM  # Wheel travel per count (mm)
+    INV_WHEEL_BASE = 1.0 / WHEEL_BASE_MM  # Multiply instead of dividing by the wheel base
+    # Combined factors applied to integer count sums/differences, so each
+    # odometry quantity takes a single float multiply
+    HALF_MM_PER_COUNT = MM_PER_COUNT * 0.5  # center-line mm per (left + right) count
+    RAD_PER_COUNT_DIFF = MM_PER_COUNT * INV_WHEEL_BASE  # heading rad per (right - left) count
     # --------------------------------------------------------------------------
 
     # The states of the FSM
@@ -40,13 +50,13 @@ class SpectatorTask:
     # --------------------------------------------------------------------------
     def __init__(self, run_observer,
                  game_origin_mode,
-                 left_pos_sh, right_pos_sh, total_s_sh,
+                 motor_sample, total_s_sh,
                  abs_x_sh, abs_y_sh, abs_theta_sh,
                  x0_mm=0.0, y0_mm=0.0, theta0_rad=0.0):
 
         # Shares
-        self.left_pos_sh = left_pos_sh
-        self.right_pos_sh = right_pos_sh
+        self.motor_sample = motor_sample
+        self._sample = array('l', [0] * 5) # local copy of the sample, reused every tick
         self.total_s_sh = total_s_sh
         self.abs_x_sh = abs_x_sh
         self.abs_y_sh = abs_y_sh
@@ -115,8 +125,9 @@ class SpectatorTask:
             self.total_s_sh.put(0.0)
 
         # Read current encoder positions to define our baselines
-        left_counts  = self.left_pos_sh.get()
-        right_counts = self.right_pos_sh.get()
+        self.motor_sample.read_into(self._sample)
+        left_counts  = self._sample[1]
+        right_counts = self._sample[2]
 
         # Baselines for "since start of run" and "since last step"
         self.start_left_counts   = left_counts
@@ -128,7 +139,14 @@ class SpectatorTask:
     # --------------------------------------------------------------------------
     ### FINITE STATE MACHINE
     # --------------------------------------------------------------------------
+    # Compiled to machine code: the odometry step is mostly arithmetic, and
+    # the native emitter supports generators and ordinary method calls
+    @micropython.native
     def run(self):
+        # Scalar trig from math (not ulab), bound to locals so the loop skips
+        # the module attribute lookup each tick
+        cos = math.cos
+        sin = math.sin
         while True:
             ### 0: INIT STATE --------------------------------------------------
             if self.state == self.S0_INIT:
@@ -155,47 +173,60 @@ class SpectatorTask:
                     self.state = self.S1_WAITING
                     continue  # Skip the rest of this loop iteration
 
-                # Read current encoder positions [counts]
-                left_counts = self.left_pos_sh.get()
-                right_counts = self.right_pos_sh.get()
+                # Read current encoder positions [counts] from one consistent sample
+                sample = self._sample
+                self.motor_sample.read_into(sample)
+                left_counts = sample[1]
+                right_counts = sample[2]
 
                 # Incremental counts since last update
                 d_counts_L = left_counts - self.prev_left_counts
                 d_counts_R = right_counts - self.prev_right_counts
 
-                # Convert to wheel displacements [mm]
-                d_sL = d_counts_L * self.RAD_PER_COUNT * self.WHEEL_RADIUS_MM
-                d_sR = d_counts_R * self.RAD_PER_COUNT * self.WHEEL_RADIUS_MM
-
-                # Compute the incremental displacement at Romi's center [mm]
-                d_s = (d_sL + d_sR) / 2.0
-
-                # Compute the incremental change in heading [rad]
-                d_theta = (d_sR - d_sL) / self.WHEEL_BASE_MM
-
-                # Assume that during this small time step interval, Romi's heading changes linearly; thus, the average heading is:
-                theta_mid = self.theta_rad + (d_theta / 2.0)
-
-                # Integrate pose in the world frame
-                self.x_mm     += d_s * math.cos(theta_mid)
-                self.y_mm     += d_s * math.sin(theta_mid)
-                self.theta_rad += d_theta
-
-                # Update previous encoder readings [counts] for next iteration
-                self.prev_left_counts  = left_counts
-                self.prev_right_counts = right_counts
-
-                # Calculate the total distance traveled along the center line since the start of the run [mm]
-                center_counts = ((left_counts - self.start_left_counts) + (right_counts - self.start_right_counts)) / 2.0
-                total_s_mm = center_counts * self.RAD_PER_COUNT * self.WHEEL_RADIUS_MM
-
-                # Update shares with new pose estimates
-                self.total_s_sh.put(total_s_mm)
-                self.abs_x_sh.put(self.x_mm)
-                self.abs_y_sh.put(self.y_mm)
-                self.abs_theta_sh.put(self.theta_rad)
-
-                # For debugging: print the estimated pose
-                # print(f"{total_s_mm}, {self.x_mm}, {self.y_mm}, {self.theta_rad}")
+                # Wheels haven't moved: pose, distance, and shares are all unchanged,
+                # so skip the trig and share writes entirely
+                if d_counts_L or d_counts_R:
+                    # Compute the incremental displacement at Romi's center [mm]
+                    # (d_sL + d_sR)/2, with the sum and difference kept in integer counts
+                    half_mm_per_count = self.HALF_MM_PER_COUNT
+                    d_s = (d_counts_L + d_counts_R) * half_mm_per_count
+
+                    # Compute the incremental change in heading [rad], (d_sR - d_sL)/w
+                    d_theta = (d_counts_R - d_counts_L) * self.RAD_PER_COUNT_DIFF
+
+                    # Assume that during this small time step interval, Romi's heading changes linearly; thus, the average heading is:
+                    theta = self.theta_rad
+                    x_mm = self.x_mm
+                    y_mm = self.y_mm
+
+                    # Integrate pose in the world frame. When the wheels turned by
+                    # equal and opposite counts (pivot in place) the center didn't
+                    # move, so only the heading changes and the trig is skipped
+                    if d_counts_L + d_counts_R:
+                        theta_mid = theta + 0.5 * d_theta
+                        x_mm += d_s * cos(theta_mid)
+                        y_mm += d_s * sin(theta_mid)
+                    theta += d_theta
+                    self.x_mm = x_mm
+                    self.y_mm = y_mm
+                    self.theta_rad = theta
+
+                    # Update previous encoder readings [counts] for next iteration
+                    self.prev_left_counts  = left_counts
+                    self.prev_right_counts = right_counts
+
+                    # Calculate the total distance traveled along the center line since the start of the run [mm]
+                    total_counts = (left_counts - self.start_left_counts) + (right_counts - self.start_right_counts)
+                    total_s_mm = total_counts * half_mm_per_count
+
+                    # Update shares with new pose estimates
+                    self.total_s_sh.put(total_s_mm)
+                    self.abs_x_sh.put(x_mm)
+                    self.abs_y_sh.put(y_mm)
+                    self.abs_theta_sh.put(theta)
+
+                    # For debugging: print the estimated pose (one %-format call, one string)
+                    if _DEBUG:
+                        print("%.2f, %.2f, %.2f, %.4f" % (total_s_mm, x_mm, y_mm, theta))
 
             yield self.state # Yield control to allow other tasks to run
\ No newline at end of file
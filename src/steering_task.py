@@ -4,8 +4,13 @@
 
 This module defines the SteeringTask class, which implements a finite state machine (FSM) to manage the outer-loop control for line following and waypoint navigation. The task reads sensor data from an IR array, computes motor velocity setpoints based on line position or heading error, and actuates the motors accordingly. It also handles lost-line scenarios and transitions between different control modes."""
 
+import micropython
+from micropython import const
 from pyb import millis
 
+# Debug printing switch (a const, so 'if _DEBUG:' blocks aren't compiled in while it's 0)
+_DEBUG = const(0)
+
 class SteeringTask:
     """Outer-loop controller for closed-loop line following.
     
@@ -46,6 +51,7 @@ class SteeringTask:
         # Hardware
         self.ir = ir_array
         self.battery = battery
+        self._inv_half_span = 1.0 / ir_array.half_span # normalizes centroid offset to [-1, 1]
 
         # Shares
         self.left_sp_sh = left_sp_sh # share for left motor velocity setpoint
@@ -85,10 +91,7 @@ class SteeringTask:
     # --------------------------------------------------------------------------
     def _compute_clamp_bound(self):
         """Compute the maximum speed clamp."""
-        idx_min = min(self.ir.sensor_index)
-        idx_max = max(self.ir.sensor_index)
-        half_span = 0.5 * (idx_max - idx_min) if idx_max > idx_min else 1.0
-        max_sp = abs(self.lf_target_sh.get()) + abs(self.k_line_sh.get()) * half_span
+        max_sp = abs(self.lf_target_sh.get()) + abs(self.k_line_sh.get()) * self.ir.half_span
         return max(max_sp, 1.0) # avoid zero clamp
 
     # --------------------------------------------------------------------------
@@ -102,6 +105,7 @@ class SteeringTask:
     # --------------------------------------------------------------------------
     ### FINITE STATE MACHINE
     # --------------------------------------------------------------------------
+    @micropython.native
     def run(self):
         while True:
             # S0: INIT ---------------------------------------------------------
@@ -112,10 +116,13 @@ class SteeringTask:
 
             # S1: WAIT FOR ENABLE ----------------------------------------------
             elif self.state == self.S1_WAIT_ENABLE:
-                self._publish(0.0, 0.0) # ensure motors are stopped
-                if self.control_mode.get() == 2: # if line following enabled
+                # Zero setpoints were already published on the way into this
+                # state (from S0 or when S2/S3/S4 stopped), so there is
+                # nothing new to compute or publish while waiting
+                control_mode = self.control_mode.get()
+                if control_mode == 2: # if line following enabled
                     self.state = self.S2_FOLLOW # go to FOLLOW state
-                elif self.control_mode.get() == 3:
+                elif control_mode == 3:
                     self.state = self.S4_HEADING # go to FOLLOW state
 
             # S2: FOLLOW LINE --------------------------------------------------
@@ -124,22 +131,19 @@ class SteeringTask:
                     if self.mtr_enable.get():
                         # print("SteeringTask: Line-following active.")
                         # Read gains and recalculate clamp
-                        centroid, seen = self.ir.get_centroid() # get line centroid
+                        offset, seen = self.ir.get_centroid_error() # line centroid relative to center index
                         if not seen:
                             # No line detected -> go to LOST
                             self.state = self.S3_LOST
                         else:
-                            center = self.ir.center_index() # ideal centroid index
                             # Normalize error to [-1, 1] based on sensor index span
-                            idx_min = min(self.ir.sensor_index)
-                            idx_max = max(self.ir.sensor_index)
-                            half_span = 0.5 * (idx_max - idx_min) if idx_max > idx_min else 1.0
-                            error_norm = (centroid - center) / half_span + self.bias.get() # -1 (far left) to +1 (far right)
+                            error_norm = offset * self._inv_half_span + self.bias.get() # -1 (far left) to +1 (far right)
 
                             correction = self.k_line_sh.get() * error_norm # steering correction
                             v_left = self.lf_target_sh.get() + correction # correct steering
                             v_right = self.lf_target_sh.get() - correction # correct steering
-                            # print(f"SteeringTask: centroid={centroid:.2f}, error_norm={error_norm:.2f}, correction={correction:.2f}, v_left={v_left:.2f}, v_right={v_right:.2f}")
+                            if _DEBUG:
+                                print(f"SteeringTask: offset={offset:.2f}, error_norm={error_norm:.2f}, correction={correction:.2f}, v_left={v_left:.2f}, v_right={v_right:.2f}")
                             self._publish(v_left, v_right)
                 else:
                     # print("SteeringTask: Line-following disabled.")
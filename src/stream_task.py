@@ -7,6 +7,7 @@ Previously, data was moved from shares into queues by data_task.py. Now, stream_
 """
 
 import time
+from array import array
 
 class StreamTask:
     """Streams data (in CSV format) over Bluetooth if enabled.
@@ -14,14 +15,12 @@ class StreamTask:
     Attributes:
         ser: Serial interface (Bluetooth UART).
         stream_data: Flag to control whether streaming is active.
-        time_sh: Share for the current time.
-        left_pos_sh: Share for the left encoder position.
-        right_pos_sh: Share for the right encoder position.
-        left_vel_sh: Share for the left encoder velocity.
-        right_vel_sh: Share for the right encoder velocity.
+        motor_sample: ShareBank holding the latest (time, left_pos, right_pos, left_vel, right_vel) sample.
         motor_data_ready: Flag indicating new motor data is available.
         abort: Flag to abort streaming immediately.
 
+    The three flags must come from the same task_share.ShareFlags, since S2 checks them with one read.
+
     """
 
     # The states of the FSM
@@ -33,7 +32,7 @@ class StreamTask:
     ### Initialize the object's attributes
     # --------------------------------------------------------------------------
     def __init__(self, stream_data, uart,
-                 time_sh, left_pos_sh, right_pos_sh, left_vel_sh, right_vel_sh,
+                 motor_sample,
                  motor_data_ready, abort):
 
         # Serial interface (Bluetooth UART)
@@ -45,11 +44,15 @@ class StreamTask:
         self.abort = abort
 
         # Shares
-        self.time_sh = time_sh
-        self.left_pos_sh = left_pos_sh
-        self.right_pos_sh = right_pos_sh
-        self.left_vel_sh = left_vel_sh
-        self.right_vel_sh = right_vel_sh
+        self.motor_sample = motor_sample
+        self._sample = array('l', [0] * 5) # local copy of the sample, reused every tick
+
+        # S2 polls all three flags every tick, so it reads their shared word once
+        # and tests it against each flag's bit
+        self._flags_get = abort.flags.get
+        self._abort_mask = abort.mask
+        self._stream_mask = stream_data.mask
+        self._ready_mask = motor_data_ready.mask
        
         # Initial values
         self.sent_end = 0
@@ -75,18 +78,21 @@ class StreamTask:
                 if self.stream_data.get():
                     print("Stream Task: starting live data streaming...")
                     self.state = self.S2_STREAM_DATA # set next state
+                    continue # handle S2 now, so a sample that woke this run isn't skipped
                 
             ### 2: STREAM DATA STATE -------------------------------------------
             elif (self.state == self.S2_STREAM_DATA):
+                flags = self._flags_get() # one read for all three flags
+
                 # 1) If ABORT, send END once and reset counter, but leave stream_data alone (so streaming can stay "armed" for next test)
-                if self.abort.get():
+                if flags & self._abort_mask:
                     if self.sent_end == 0:
                         self.ser.write(b"<S>#END<E>\n") # explicit end marker
                         self.sent_end = 1
                     self.lines_sent = 0 # reset line counter for next stream
 
                 # 2) If streaming is turned OFF, send END once, reset counter, and go back to WAIT_FOR_TRIGGER until re-enabled
-                elif not self.stream_data.get():
+                elif not flags & self._stream_mask:
                     if self.sent_end == 0:
                         self.ser.write(b"<S>#END<E>\n") # explicit end marker
                         self.sent_end = 1
@@ -95,20 +101,17 @@ class StreamTask:
                     self.state = self.S1_WAIT_FOR_TRIGGER # set next state
 
                 # 3) Normal streaming: only send when new motor data is ready to avoid duplicates
-                elif self.motor_data_ready.get():
+                elif flags & self._ready_mask:
                     self.sent_end = 0 # we have new data, so clear the END sent flag; next time abort/streaming off happens, we'll need to send END again exactly once
-                    # Read the relevant data from the shares
-                    t = self.time_sh.get()
-                    pL = self.left_pos_sh.get()
-                    pR = self.right_pos_sh.get()
-                    vL = self.left_vel_sh.get()
-                    vR = self.right_vel_sh.get()
-
-                    # Put it all into a CSV-style line stamped with the index
-                    payload = f"{self.lines_sent},{t},{pL},{pR},{vL},{vR}"
-                    framed = f"<S>{payload}<E>" # framed packet to send; start and end delimeters help process data on the PC side
-                    # Send the line over Bluetooth
-                    self.ser.write(framed.encode() + b"\n")
+                    # Copy the whole sample out of the share bank at once
+                    self.motor_sample.read_into(self._sample)
+                    t, pL, pR, vL, vR = self._sample
+
+                    # Put it all into a CSV-style line stamped with the index, framed with
+                    # start and end delimiters to help process data on the PC side.
+                    # The whole frame is formatted in one step and written as-is
+                    # (UART.write() takes a str), so only one string is allocated
+                    self.ser.write(f"<S>{self.lines_sent},{t},{pL},{pR},{vL},{vR}<E>\n")
                     
                     self.lines_sent += 1 # Increment the line counter
                     self.motor_data_ready.put(0) # Clear the data-ready flag (avoid duplicates)
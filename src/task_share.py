@@ -348,11 +348,22 @@ class Share (BaseShare):
     #  @param thread_protect True if mutual exclusion protection is used
     #  @param name A short name for the share, default @c ShareN where @c N
     #         is a serial number for the share
-    def __init__ (self, type_code, thread_protect = True, name = None):
+    #  @param bank An optional @c ShareBank of the same type in which this
+    #         share's data is kept, rather than in a buffer of its own; it's
+    #         easier to use @c ShareBank.share() than to set this directly
+    #  @param index The slot in @c bank which holds this share's data
+    def __init__ (self, type_code, thread_protect = True, name = None,
+                  bank = None, index = 0):
         # First call the parent class initializer
         super ().__init__ (type_code, thread_protect, name)
 
-        self._buffer = array.array (type_code, [0])
+        if bank is None:
+            self._buffer = array.array (type_code, [0])
+        else:
+            if bank._type_code != type_code:
+                raise ValueError ("Share type must match its ShareBank's type")
+            # A one-item view into the bank, so put() and get() are unchanged
+            self._buffer = memoryview (bank._buffer)[index:index + 1]
 
         self._name = str (name) if name != None \
             else 'Share' + str (Share.ser_num)
@@ -410,3 +421,438 @@ class Share (BaseShare):
                 type_code_strings[self._type_code]))
 
 
+# ============================================================================
+
+## A fixed-size bank of related data items shared between tasks.
+#  This class holds several values of the same type in one array so that a
+#  producer can publish a complete, consistent snapshot (for example one
+#  motor data sample) and a consumer can copy the whole snapshot into its
+#  own storage with a single slice assignment, rather than calling @c put()
+#  and @c get() on a separate @c Share for every value.
+#
+#  An example of the creation and use of a share bank is as follows:
+#  @code
+#  import task_share
+#
+#  # This bank holds five signed 32-bit integers
+#  my_bank = task_share.ShareBank ('l', 5, name="My Bank")
+#
+#  # Somewhere in one task, write a complete snapshot into the bank
+#  my_bank.write ((t, a, b, c, d))
+#
+#  # In another task, copy the snapshot into row 3 of a larger array
+#  my_bank.read_into (big_array, 3 * 5)
+#  @endcode
+class ShareBank (BaseShare):
+
+    ## A counter used to give serial numbers to share banks for diagnostic use.
+    ser_num = 0
+
+
+    ## Create a bank of shared data items of one type.
+    #
+    #  @param type_code The type of data items which the bank holds (see
+    #         @c Share for the list of type codes)
+    #  @param size The number of items in the bank
+    #  @param thread_protect True if mutual exclusion protection is used
+    #  @param name A short name for the bank, default @c ShareBankN where
+    #         @c N is a serial number for the bank
+    def __init__ (self, type_code, size, thread_protect = True, name = None):
+        # First call the parent class initializer
+        super ().__init__ (type_code, thread_protect, name)
+
+        self._size = size
+        self._buffer = array.array (type_code, [0] * size)
+        self._next_slot = 0                 # Next slot to hand out in share()
+
+        self._name = str (name) if name != None \
+            else 'ShareBank' + str (ShareBank.ser_num)
+        ShareBank.ser_num += 1
+
+
+    ## Create a @c Share whose data lives in the next free slot of this bank.
+    #
+    #  The share works just like one made with @c Share(), but instead of
+    #  allocating its own buffer it uses one item of the bank's array, so
+    #  many related shares can be kept in one contiguous block of memory.
+    #  @param name A short name for the share
+    #  @return A new @c Share backed by this bank
+    def share (self, name = None):
+        if self._next_slot >= self._size:
+            raise ValueError ("ShareBank " + self._name + " is full")
+        index = self._next_slot
+        self._next_slot += 1
+        return Share (self._type_code, self._thread_protect, name,
+                      bank = self, index = index)
+
+
+    ## Write one item of data into the bank at the given index.
+    #  @param index The index of the item to be written
+    #  @param data The data to be put into the bank
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def put (self, index, data, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        self._buffer[index] = data
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+
+    ## Read one item of data from the bank at the given index.
+    #  @param index The index of the item to be read
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def get (self, index, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        to_return = self._buffer[index]
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        return (to_return)
+
+
+    ## Write a complete snapshot into the bank.
+    #
+    #  All items are written with interrupts disabled (if thread protection
+    #  is on), so a reader never sees a mix of old and new values.
+    #  @param values A sequence of exactly @c size items
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def write (self, values, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        buf = self._buffer
+        for i in range (self._size):
+            buf[i] = values[i]
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+
+    ## Copy the complete snapshot into another array of the same type.
+    #
+    #  The copy is a single slice assignment, so no per-item method calls
+    #  or new objects are needed.
+    #  @param dest An @c array.array with the same type code as this bank
+    #  @param offset The index in @c dest at which to put the first item
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def read_into (self, dest, offset = 0, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        dest[offset:offset + self._size] = self._buffer
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+
+    ## Puts diagnostic information about the share bank into a string.
+    def __repr__ (self):
+        return ("{:<12s} ShareBank<{:s}>[{:d}]".format (self._name,
+                type_code_strings[self._type_code], self._size))
+
+
+# ============================================================================
+
+## A ring of fixed-width rows passed from one producer task to one consumer.
+#  This class works like a @c ShareBank which remembers more than one
+#  snapshot. The producer writes a complete row (for example one motor data
+#  sample) into the next free slot and then advances the tail index; the
+#  consumer copies rows out from the head index until it catches up. Because
+#  only the producer changes the tail and only the consumer changes the head,
+#  rows are never torn and no samples are lost when the consumer runs less
+#  often than the producer, as long as the ring doesn't fill up.
+#
+#  The number of rows must be a power of two so that the indices can wrap
+#  with a bit mask.
+#
+#  An example of the creation and use of a share ring is as follows:
+#  @code
+#  import task_share
+#
+#  # This ring holds 8 rows of five signed 32-bit integers
+#  my_ring = task_share.ShareRing ('l', 5, 8, name="My Ring")
+#
+#  # Somewhere in one task, write a complete row into the ring
+#  my_ring.write ((t, a, b, c, d))
+#
+#  # In another task, copy every waiting row into a larger array
+#  while my_ring.read_into (big_array, row * 5):
+#      row += 1
+#  @endcode
+class ShareRing (BaseShare):
+
+    ## A counter used to give serial numbers to share rings for diagnostic use.
+    ser_num = 0
+
+
+    ## Create a ring of rows of shared data items of one type.
+    #
+    #  @param type_code The type of data items which the ring holds (see
+    #         @c Share for the list of type codes)
+    #  @param width The number of items in each row
+    #  @param rows The number of rows in the ring; must be a power of two.
+    #         One row is always left empty, so at most @c rows - 1 rows
+    #         can be waiting at once
+    #  @param thread_protect True if mutual exclusion protection is used
+    #  @param name A short name for the ring, default @c ShareRingN where
+    #         @c N is a serial number for the ring
+    def __init__ (self, type_code, width, rows, thread_protect = True,
+                  name = None):
+        # First call the parent class initializer
+        super ().__init__ (type_code, thread_protect, name)
+
+        if rows <= 0 or rows & (rows - 1):
+            raise ValueError ("ShareRing rows must be a power of two")
+
+        self._width = width
+        self._rows = rows
+        self._mask = rows - 1
+        self._buffer = array.array (type_code, [0] * (width * rows))
+        self._view = memoryview (self._buffer)  # Slicing this doesn't copy
+        self._head = 0                      # Next row to be read
+        self._tail = 0                      # Next row to be written
+        self._dropped = 0                   # Rows lost because ring was full
+
+        self._name = str (name) if name != None \
+            else 'ShareRing' + str (ShareRing.ser_num)
+        ShareRing.ser_num += 1
+
+
+    ## Write one complete row into the ring.
+    #
+    #  If the ring is full, the row is dropped (and counted) rather than
+    #  overwriting a row the consumer hasn't read yet.
+    #  @param values A sequence of exactly @c width items
+    #  @param in_ISR Set this to True if calling from within an ISR
+    #  @return @c True if the row was written, @c False if the ring was full
+    @micropython.native
+    def write (self, values, in_ISR = False):
+        tail = self._tail
+        nxt = (tail + 1) & self._mask
+        if nxt == self._head:
+            self._dropped += 1
+            return False
+
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        buf = self._buffer
+        start = tail * self._width
+        for i in range (self._width):
+            buf[start + i] = values[i]
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        # Publish the row only after all of it has been written
+        self._tail = nxt
+        return True
+
+
+    ## Copy the oldest unread row into another array of the same type.
+    #
+    #  The copy is a single slice assignment, so no per-item method calls
+    #  or new objects are needed.
+    #  @param dest An @c array.array with the same type code as this ring
+    #  @param offset The index in @c dest at which to put the first item
+    #  @param in_ISR Set this to True if calling from within an ISR
+    #  @return @c True if a row was copied, @c False if the ring was empty
+    @micropython.native
+    def read_into (self, dest, offset = 0, in_ISR = False):
+        head = self._head
+        if head == self._tail:
+            return False
+
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        start = head * self._width
+        dest[offset:offset + self._width] = self._view[start:start + self._width]
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        # Free the row only after it has been copied out
+        self._head = (head + 1) & self._mask
+        return True
+
+
+    ## Check if there are any unread rows in the ring.
+    #  @return @c True if rows are waiting, @c False if not
+    @micropython.native
+    def any (self):
+        return (self._head != self._tail)
+
+
+    ## Check how many unread rows are in the ring.
+    #  @return The number of rows waiting to be read
+    @micropython.native
+    def num_in (self):
+        return ((self._tail - self._head) & self._mask)
+
+
+    ## Remove all contents from the ring.
+    #
+    #  Only the consumer should call this, since it moves the head index.
+    def clear (self):
+        self._head = self._tail
+        self._dropped = 0
+
+
+    ## Puts diagnostic information about the share ring into a string.
+    def __repr__ (self):
+        return ("{:<12s} ShareRing<{:s}>[{:d}x{:d}] Dropped {:d}".format (
+                self._name, type_code_strings[self._type_code], self._rows,
+                self._width, self._dropped))
+
+
+# ============================================================================
+
+## A set of up to 16 on/off flags kept as the bits of one shared word.
+#  Tasks pass lots of simple on/off signals to each other (enable, abort,
+#  data ready, and so on). Rather than giving each one a @c Share of its own,
+#  this class keeps them all as bits in a single 16-bit word. Each flag is
+#  handed out by @c flag() as a small @c Flag object with the same @c put()
+#  and @c get() methods as a @c Share, so code which uses a flag doesn't need
+#  to change; a task which checks several flags at once can instead read the
+#  whole word with @c get() and test it against each flag's @c mask.
+#
+#  An example of the creation and use of a set of flags is as follows:
+#  @code
+#  import task_share
+#
+#  flags = task_share.ShareFlags (name="Flags")
+#  go = flags.flag (name="Go Flag")
+#  stop = flags.flag (name="Stop Flag")
+#
+#  # Somewhere in one task, set a flag just as with a Share
+#  go.put (1)
+#
+#  # In another task, check both flags with one read
+#  word = flags.get ()
+#  if word & go.mask and not word & stop.mask:
+#      ...
+#  @endcode
+class ShareFlags (BaseShare):
+
+    ## A counter used to give serial numbers to flag sets for diagnostic use.
+    ser_num = 0
+
+
+    ## Create an empty set of flags.
+    #
+    #  @param thread_protect True if mutual exclusion protection is used
+    #  @param name A short name for the set, default @c ShareFlagsN where
+    #         @c N is a serial number for the set
+    def __init__ (self, thread_protect = True, name = None):
+        # First call the parent class initializer
+        super ().__init__ ('H', thread_protect, name)
+
+        self._buffer = array.array ('H', [0])
+        self._flags = []                    # Flags handed out, for printouts
+
+        self._name = str (name) if name != None \
+            else 'ShareFlags' + str (ShareFlags.ser_num)
+        ShareFlags.ser_num += 1
+
+
+    ## Create a @c Flag which uses the next free bit of this set.
+    #  @param name A short name for the flag
+    #  @return A new @c Flag backed by one bit of this set's word
+    def flag (self, name = None):
+        bit = len (self._flags)
+        if bit >= 16:
+            raise ValueError ("ShareFlags " + self._name + " is full")
+        new_flag = Flag (self, 1 << bit, name)
+        self._flags.append (new_flag)
+        return new_flag
+
+
+    ## Set the flags whose bits are set in @c mask, leaving the others alone.
+    #  @param mask The bits to be set
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def set (self, mask, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        self._buffer[0] |= mask
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+
+    ## Clear the flags whose bits are set in @c mask, leaving the others alone.
+    #  @param mask The bits to be cleared
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def clear (self, mask, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        self._buffer[0] &= ~mask
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+
+    ## Read the whole word holding all the flags.
+    #
+    #  A single aligned 16-bit read can't be torn, so no locking is needed.
+    #  @param in_ISR Unused; accepted so this works like @c Share.get()
+    #  @return The flags, one bit each, as an integer
+    @micropython.native
+    def get (self, in_ISR = False):
+        return self._buffer[0]
+
+
+    ## Puts diagnostic information about the flags into a string.
+    def __repr__ (self):
+        return ("{:<12s} ShareFlags<{:s}> ".format (self._name,
+                type_code_strings[self._type_code])
+                + ' '.join ('{:s}={:d}'.format (f._name, 1 if f.get () else 0)
+                            for f in self._flags))
+
+
+## One on/off flag kept as a bit in a @c ShareFlags word.
+#
+#  Objects of this class are made by @c ShareFlags.flag(), not directly. They
+#  can be used anywhere a one-item @c Share holding 0 or 1 was used before.
+class Flag:
+
+    ## Create a flag which uses the given bit of a set of flags.
+    #  @param flags The @c ShareFlags object holding this flag's bit
+    #  @param mask The bit used by this flag, such as @c 0x0004
+    #  @param name A short name for the flag
+    def __init__ (self, flags, mask, name = None):
+        self.flags = flags
+        self.mask = mask
+        self._name = str (name) if name != None else 'Flag' + hex (mask)
+
+
+    ## Set the flag if @c data is true or clear it if @c data is false.
+    #  @param data The new value of the flag
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def put (self, data, in_ISR = False):
+        if data:
+            self.flags.set (self.mask, in_ISR)
+        else:
+            self.flags.clear (self.mask, in_ISR)
+
+
+    ## Read the flag.
+    #  @param in_ISR Unused; accepted so this works like @c Share.get()
+    #  @return 1 if the flag is set, 0 if not
+    @micropython.native
+    def get (self, in_ISR = False):
+        return 1 if self.flags._buffer[0] & self.mask else 0
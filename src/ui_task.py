@@ -27,6 +27,7 @@ class UITask:
         ir_array (IRArray): Infrared sensor array object.
         k_line (Share): Line following proportional gain.
         lf_target (Share): Line following target velocity.
+        task (cotask.Task): This task's scheduler entry, set by main.py so the polling period can back off while idle (optional).
     """
     # The states of the FSM
     S0_INIT = 0
@@ -36,6 +37,11 @@ class UITask:
     S4_IMU_CALIBRATION = 4
     S5_IR_CALIBRATION = 5
 
+    # Idle back-off: after IDLE_POLLS empty polls with the motors off, the
+    # polling period doubles, up to MAX_IDLE_PERIOD ms; any byte restores it
+    IDLE_POLLS = 10
+    MAX_IDLE_PERIOD = 400
+
     # --------------------------------------------------------------------------
     ### Initialize the object's attributes
     # --------------------------------------------------------------------------
@@ -73,6 +79,22 @@ class UITask:
         self.cmd_buf = ''  # buffer for incoming command
         self.prev_time = 0 # previous time for timing
 
+        # Adaptive polling period (only used if main.py sets self.task)
+        self.task = None
+        self._base_period = None # ms, the period the task was created with
+        self._period = None      # ms, the period currently in use
+        self._idle_polls = 0     # empty polls since the last byte or back-off
+
+    # --------------------------------------------------------------------------
+    ### HELPER FUNCTIONS
+    # --------------------------------------------------------------------------
+    def _set_poll_period(self, period):
+        """Change how often the scheduler runs this task (in ms) and restart the idle count."""
+        self._idle_polls = 0
+        if period is not None and period != self._period:
+            self._period = period
+            self.task.set_period(period)
+
     # --------------------------------------------------------------------------
     ### FINITE STATE MACHINE
     # --------------------------------------------------------------------------
@@ -86,17 +108,29 @@ class UITask:
                 self.planning.put(0)     # DEFAULT: path planning OFF
                 self.abort.put(0)
                 self.prev_time = ticks_ms()
+                if self.task is not None and self.task.period is not None:
+                    self._base_period = self._period = self.task.period // 1000
                 self.state = self.S1_WAIT_FOR_CMD
 
             ### 1: WAITING STATE -----------------------------------------------
             elif (self.state == self.S1_WAIT_FOR_CMD):
                 # Wait for user input (read available bytes non-blocking)
                 if self.ser.any():
+                    self._set_poll_period(self._base_period) # back to full rate
                     try:
                         self.cmd_buf = self.ser.read(1).decode()
                         self.state = self.S2_PROCESS_CMD # set next state
                     except Exception:
                         pass # Handle decoding errors gracefully
+
+                # Nothing to read: poll less often, but only while the motors
+                # are off, so a kill command is never slowed down
+                elif self._period is not None and not self.mtr_enable.get():
+                    self._idle_polls += 1
+                    if self._idle_polls >= self.IDLE_POLLS:
+                        self._set_poll_period(min(2 * self._period, self.MAX_IDLE_PERIOD))
+                else:
+                    self._set_poll_period(self._base_period)
             
             ### 2: PROCESS COMMAND STATE ---------------------------------------
             elif self.state == self.S2_PROCESS_CMD:
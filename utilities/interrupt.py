@@ -1,4 +1,5 @@
 from pyb import Pin, ExtInt
+import micropython
 
 # Initialize and configure motor pins
 Left_nSLP = Pin('PB3', mode=Pin.OUT_PP)
@@ -12,9 +13,19 @@ def disable_motors():
 
 disable_motors()
 
-def callback(line):
+# Printing allocates, which isn't allowed inside an ISR, so the callback only
+# schedules the print to run outside interrupt context
+def log_line(line):
     print("line =", line)
 
-extint = ExtInt('H0', ExtInt.IRQ_FALLING, Pin.PULL_NONE, callback)
-extint = ExtInt('H1', ExtInt.IRQ_FALLING, Pin.PULL_NONE, callback)
-extint = ExtInt('C10', ExtInt.IRQ_FALLING, Pin.PULL_NONE, callback)
\ No newline at end of file
+def callback(line):
+    # A bouncing pin can fire faster than the scheduled prints run; once the
+    # schedule queue is full, drop the extra edges instead of raising in the ISR
+    try:
+        micropython.schedule(log_line, line)
+    except RuntimeError:
+        pass
+
+# Keep every ExtInt object (one per pin) so none of them are garbage collected
+extints = tuple(ExtInt(pin, ExtInt.IRQ_FALLING, Pin.PULL_NONE, callback)
+                for pin in ('H0', 'H1', 'C10'))
\ No newline at end of file
@@ -45,4 +45,5 @@ class TasknameTask:
                 # Running code here
                 state = self.S1_WAITING
 
-            yield self.state # Yield control to allow other tasks to run
+            self.state = state # keep the attribute in sync for anyone inspecting the task
+            yield state # Yield control (and the current state, for tracing) to the scheduler